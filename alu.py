@@ -0,0 +1,136 @@
+import hashlib
+import os
+from array import array
+
+import flags
+from flags import CARRY, DECIMAL, OVERFLOW, NZ_FLAGS
+
+ALU_CACHE_ENV = "W65C02S_ALU_CACHE"  # Set to a file path to cache the tables there, building them dominates startup
+
+CACHE_MAGIC = b"W65A"
+CACHE_VERSION = 2
+
+# Tables are indexed by (P & CARRY | (P & DECIMAL) >> 2) << 16 | A << 8 | operand, one 64 KB slot for
+# each combination of D and C, and hold the result byte in the low byte and the N, V, Z and C bits of P
+# in the high byte
+TABLE_SIZE = 4 << 16
+
+
+def table_index(p: int, a: int, operand: int) -> int:
+    return (p & CARRY | (p & DECIMAL) >> 2) << 16 | a << 8 | operand
+
+
+def _entry(result: int, carry: bool, overflow: bool) -> int:
+    result &= 0xFF
+    flags = NZ_FLAGS[result] | (CARRY if carry else 0) | (OVERFLOW if overflow else 0)
+    return (flags << 8) | result
+
+
+def _adc(a: int, b: int, c: int, decimal: bool) -> int:
+    if not decimal:
+        result = a + b + c
+        return _entry(result, result > 0xFF, (a ^ result) & (b ^ result) & 0x80)
+
+    low = (a & 0x0F) + (b & 0x0F) + c
+    if low >= 0x0A:
+        low = ((low + 0x06) & 0x0F) + 0x10
+
+    result = (a & 0xF0) + (b & 0xF0) + low
+
+    # V comes from the signed sum before the high digit is adjusted
+    signed = (a & 0xF0) - ((a & 0x80) << 1) + (b & 0xF0) - ((b & 0x80) << 1) + low
+
+    if result >= 0xA0:
+        result += 0x60
+
+    return _entry(result, result > 0xFF, signed < -128 or signed > 127)
+
+
+def _sbc(a: int, b: int, c: int, decimal: bool) -> int:
+    binary = a - b - (1 - c)
+    carry = binary >= 0
+    overflow = (a ^ b) & (a ^ binary) & 0x80
+
+    if not decimal:
+        return _entry(binary, carry, overflow)
+
+    low = (a & 0x0F) - (b & 0x0F) + c - 1
+    result = binary
+    if result < 0:
+        result -= 0x60
+    if low < 0:
+        result -= 0x06
+
+    return _entry(result, carry, overflow)
+
+
+def build_tables() -> tuple[array, array]:
+    adc_table = array("H", bytes(TABLE_SIZE * 2))
+    sbc_table = array("H", bytes(TABLE_SIZE * 2))
+
+    for p in (0, CARRY, DECIMAL, DECIMAL | CARRY):
+        c = p & CARRY
+        decimal = bool(p & DECIMAL)
+
+        for a in range(0x100):
+            base = table_index(p, a, 0x00)
+            for b in range(0x100):
+                adc_table[base + b] = _adc(a, b, c, decimal)
+                sbc_table[base + b] = _sbc(a, b, c, decimal)
+
+    return adc_table, sbc_table
+
+
+def cache_header() -> bytes:
+    # The tables are generated by this module from the flag layout in flags.py,
+    # a cache whose header holds a different digest of the two was built by other code
+    digest = hashlib.sha256()
+    for path in (__file__, flags.__file__):
+        with open(path, "rb") as source_file:
+            digest.update(source_file.read())
+
+    return CACHE_MAGIC + bytes((CACHE_VERSION,)) + digest.digest()
+
+
+def load_tables(cache_path: str = None) -> tuple[array, array]:
+    if not cache_path:
+        return build_tables()
+
+    header = cache_header()
+    try:
+        with open(cache_path, "rb") as cache_file:
+            if cache_file.read(len(header)) == header:
+                adc_table, sbc_table = array("H"), array("H")
+                adc_table.fromfile(cache_file, TABLE_SIZE)
+                sbc_table.fromfile(cache_file, TABLE_SIZE)
+                return adc_table, sbc_table
+    except (OSError, EOFError):
+        pass  # Missing, unreadable or truncated, rebuilt below
+
+    adc_table, sbc_table = build_tables()
+
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "wb") as cache_file:
+            cache_file.write(header)
+            adc_table.tofile(cache_file)
+            sbc_table.tofile(cache_file)
+        os.replace(temp_path, cache_path)  # Concurrent processes never read a partial file
+    except OSError:
+        pass  # Unwritable location, the tables are rebuilt on every start
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    return adc_table, sbc_table
+
+
+def __getattr__(name: str):
+    # ADC_TABLE and SBC_TABLE are built on first use, programs that never add or subtract don't pay for them
+    global ADC_TABLE, SBC_TABLE
+
+    if name not in ("ADC_TABLE", "SBC_TABLE"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    ADC_TABLE, SBC_TABLE = load_tables(os.environ.get(ALU_CACHE_ENV))
+    return globals()[name]
@@ -1,9 +1,8 @@
 import re
 import argparse
 
-from w65c02s import W65C02S
 from addr_modes.handler import handle_adm
-import instructions as instr
+from opcodes import ASSEMBLY, OPCODE_TABLE
 
 
 def preprocess(lines: list) -> tuple[list, dict]:
@@ -86,14 +85,11 @@ def asm_to_binary(lines: list, bin_file: str) -> None:
             instruction = instruction[:len(instruction) - 2]
 
         adm, operand = handle_adm(is_indirect, instruction, *args)
-        opcode = getattr(getattr(instr, instruction.lower()), f"ADM_{adm}")
+        opcode = ASSEMBLY[(instruction.upper(), adm)]
 
         bin_program.append(opcode.to_bytes(1, "big"))
-        if operand:
-            if operand > 255:
-                bin_program.append(operand.to_bytes(2, "little"))
-            else:
-                bin_program.append(operand.to_bytes(1, "big"))
+        if OPCODE_TABLE[opcode].length > 1:  # Operand size comes from the opcode, a zero operand is still emitted
+            bin_program.append((operand or 0).to_bytes(OPCODE_TABLE[opcode].length - 1, "little"))
     
     with open(bin_file, "wb") as file:
         file.write(b"".join(bin_program))
@@ -106,8 +102,6 @@ if __name__ == "__main__":
 
     _args = parser.parse_args()
 
-    _proc = W65C02S()
-
     with open(_args.asm_file, "r") as file:
         _lines, _labels = preprocess(file.readlines())
-        asm_to_binary(_proc, _lines, _args.rom_file)
+        asm_to_binary(_lines, _args.rom_file)
@@ -0,0 +1,31 @@
+import time
+
+__all__ = [
+    "micro",
+    "programs",
+    "assembler",
+]
+
+
+def best_of(func, repeat: int) -> float:
+    # Best wall time of several runs, the least disturbed by the rest of the system
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return best
+
+
+def rates(seconds: float, instructions: int, cycles: int) -> dict:
+    return {
+        "seconds": seconds,
+        "instructions": instructions,
+        "cycles": cycles,
+        "mips": instructions / seconds / 1e6,
+        "mhz": cycles / seconds / 1e6,
+    }
@@ -0,0 +1,76 @@
+import argparse
+import json
+import platform
+import sys
+
+from benchmarks import assembler, micro, programs
+
+SUITES = {
+    "micro": micro,
+    "programs": programs,
+    "assembler": assembler,
+}
+
+RATE_KEYS = ("mips", "lines_per_sec")  # Higher is better, the first one present is compared
+DEFAULT_THRESHOLD = 10.0  # Slowdown in percent reported as a regression
+
+
+def _rate(result: dict) -> tuple[str, float]:
+    for key in RATE_KEYS:
+        if key in result:
+            return key, result[key]
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    regressions = []
+
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        key, rate = _rate(result)
+        base_rate = baseline[name][key]
+        change = (rate - base_rate) / base_rate * 100
+
+        print(f"{name:40} {base_rate:12.3f} -> {rate:12.3f} {key} ({change:+.1f}%)")
+        if change < -threshold:
+            regressions.append(name)
+
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("W65C02S benchmarks")
+    parser.add_argument("--suite", dest="suites", action="append", choices=SUITES.keys(),
+                        help="suite to run, can be repeated, all suites run by default")
+    parser.add_argument("--repeat", dest="repeat", type=int, default=3,
+                        help="timed samples per benchmark, the best one is kept")
+    parser.add_argument("--output", dest="output", type=str, help="write the results as JSON to this file")
+    parser.add_argument("--baseline", dest="baseline", type=str,
+                        help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", dest="threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown in percent that fails the comparison")
+    _args = parser.parse_args()
+
+    _results = {}
+    for _name in _args.suites or SUITES.keys():
+        _results.update(SUITES[_name].run(_args.repeat))
+
+    for _name, _result in _results.items():
+        if "mips" in _result:
+            print(f"{_name:40} {_result['mips']:8.3f} MIPS {_result['mhz']:8.3f} MHz")
+        else:
+            print(f"{_name:40} {_result['lines_per_sec']:12.1f} lines/s")
+
+    if _args.output is not None:
+        with open(_args.output, "w") as _output_file:
+            json.dump({"python": platform.python_version(), "results": _results}, _output_file, indent=4)
+
+    if _args.baseline is not None:
+        with open(_args.baseline, "r") as _baseline_file:
+            _baseline = json.load(_baseline_file)["results"]
+
+        _regressions = compare(_results, _baseline, _args.threshold)
+        if _regressions:
+            print(f"{len(_regressions)} regressions over {_args.threshold}%: {', '.join(_regressions)}")
+            sys.exit(1)
@@ -0,0 +1,45 @@
+import os
+import tempfile
+
+from asm_to_bin import preprocess, asm_to_binary
+from benchmarks import best_of
+
+REPEAT_SOURCE = 50  # Copies of the sample source in the benchmark program
+
+# One line per addressing mode the assembler understands
+SOURCE = [
+    "start:",
+    "  LDA #$05",
+    "  STA $0200",
+    "  LDA $10,X",
+    "  LDX $10,Y",
+    "  LDA $1234,X",
+    "  LDA $1234,Y",
+    "  LDA ($20,X)",
+    "  LDA ($20),Y",
+    "  ADC $10  ; add",
+    "  ASL A",
+    "  INX",
+    "  PHA",
+]
+
+
+def run(repeat: int = 3) -> dict:
+    lines = SOURCE * REPEAT_SOURCE
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        bin_file = os.path.join(tmp_dir, "bench.bin")
+
+        def assemble():
+            asm_lines, labels = preprocess(list(lines))
+            asm_to_binary(asm_lines, bin_file)
+
+        seconds = best_of(assemble, repeat)
+
+    return {
+        "assembler.asm_to_bin": {
+            "seconds": seconds,
+            "lines": len(lines),
+            "lines_per_sec": len(lines) / seconds,
+        },
+    }
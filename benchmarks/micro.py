@@ -0,0 +1,64 @@
+import random
+import sys
+
+from benchmarks import best_of, rates
+from opcodes import DISPATCH, MNEMONICS
+from w65c02s import W65C02S
+
+CALLS = 10_000  # Handler calls per timed sample
+
+
+def _setup(memory: bytes) -> W65C02S:
+    proc = W65C02S()
+    proc.MEMORY_VIEW[:] = memory
+    return proc
+
+
+def _call(proc: W65C02S, opcode: int, operand: bytes):
+    # Drives the module's execute_opcode where it exists, modules that only have
+    # the execute_opcode stub are driven through their addressing mode handler
+    handler, num_bytes, decode, cycles = DISPATCH[opcode]
+    module = sys.modules[handler.__module__]
+
+    if module.execute_opcode.__code__.co_argcount:
+        execute_opcode = module.execute_opcode
+        return lambda: execute_opcode(proc, opcode, *operand)
+
+    if decode is None:
+        return lambda: handler(proc)
+
+    value = decode(bytes((opcode,)) + operand, 0)
+    return lambda: handler(proc, value)
+
+
+def run(repeat: int = 3) -> dict:
+    results = {}
+    modes = {}
+    memory = random.Random(0).randbytes(0x10000)  # Same pseudo-random memory for every opcode
+
+    for opcode, (handler, num_bytes, decode, cycles) in enumerate(DISPATCH):
+        if MNEMONICS[opcode] is None:
+            continue
+
+        proc = _setup(memory)
+        operand = bytes((0x40, 0x12))[:num_bytes - 1]
+        call = _call(proc, opcode, operand)
+
+        def sample():
+            for _ in range(CALLS):
+                call()
+
+        seconds = best_of(sample, repeat)
+        mode = handler.__name__.upper()
+        result = rates(seconds, CALLS, CALLS * cycles)
+
+        results[f"opcode.{opcode:02X}.{MNEMONICS[opcode]}.{mode}"] = result
+        modes.setdefault(mode, []).append(result)
+
+    for mode, mode_results in modes.items():
+        seconds = sum(result["seconds"] for result in mode_results)
+        instructions = sum(result["instructions"] for result in mode_results)
+        cycles = sum(result["cycles"] for result in mode_results)
+        results[f"mode.{mode}"] = rates(seconds, instructions, cycles)
+
+    return results
@@ -0,0 +1,109 @@
+import random
+
+import instructions as instr
+from benchmarks import best_of, rates
+from w65c02s import W65C02S
+
+BASE = 0x8000  # Load and start address of every program
+ITERATIONS = 20  # Program runs per timed sample
+
+ENGINES = ("interpreter", "blocks", "jit")
+
+
+# Straight-line programs (there are no branch instructions yet), each builder returns
+# the program bytes, the number of instructions executed and the initial memory contents
+
+def memcpy() -> tuple[bytes, int, dict]:
+    # Copy 256 bytes from $0300 to $0400, one LDA/STA/INX group per byte
+    program = [instr.ldx.ADM_IA, 0x00]
+    for _ in range(0x100):
+        program += [instr.lda.ADM_AIX, 0x00, 0x03, instr.sta.ADM_AIX, 0x00, 0x04, instr.inx.ADM_I]
+
+    data = bytes(random.Random(0).randrange(0x100) for _ in range(0x100))
+    return bytes(program), 1 + 3 * 0x100, {0x0300: data}
+
+
+def bcd() -> tuple[bytes, int, dict]:
+    # Add a 4-byte BCD number at $10 into a 4-byte BCD accumulator at $20, 64 times
+    program = [instr.sed.ADM_I]
+    count = 1
+    for _ in range(64):
+        program += [instr.clc.ADM_I]
+        count += 1
+        for byte in range(4):
+            program += [instr.lda.ADM_ZP, 0x20 + byte, instr.adc.ADM_ZP, 0x10 + byte, instr.sta.ADM_ZP, 0x20 + byte]
+            count += 3
+
+    program += [instr.cld.ADM_I]
+    return bytes(program), count + 1, {0x0010: bytes((0x89, 0x67, 0x45, 0x23))}
+
+
+def sort() -> tuple[bytes, int, dict]:
+    # Odd-even transposition sort of 16 bytes at $10, every compare-exchange is branchless:
+    # the borrow of CMP is turned into a swap mask and the pair is swapped with EOR
+    size = 16
+    program = [instr.cld.ADM_I]
+    count = 1
+    for round_ in range(size):
+        for i in range(round_ % 2, size - 1, 2):
+            a, b = 0x10 + i, 0x11 + i
+            program += [
+                instr.lda.ADM_ZP, b, instr.cmp.ADM_ZP, a,  # C = b >= a
+                instr.lda.ADM_IA, 0x00, instr.sbc.ADM_IA, 0x00,  # A = 0xFF when a > b
+                instr.sta.ADM_ZP, 0x00,
+                instr.lda.ADM_ZP, a, instr.eor.ADM_ZP, b, instr.and_.ADM_ZP, 0x00,
+                instr.sta.ADM_ZP, 0x00,  # Bits that differ when swapping
+                instr.eor.ADM_ZP, a, instr.sta.ADM_ZP, a,
+                instr.lda.ADM_ZP, b, instr.eor.ADM_ZP, 0x00, instr.sta.ADM_ZP, b,
+            ]
+            count += 14
+
+    data = bytes(random.Random(0).randrange(0x100) for _ in range(size))
+    return bytes(program), count, {0x0010: data}
+
+
+PROGRAMS = {
+    "memcpy": memcpy,
+    "bcd": bcd,
+    "sort": sort,
+}
+
+
+def make_proc(engine: str, program: bytes, memory: dict) -> W65C02S:
+    proc = W65C02S()
+    proc.load_rom(program, BASE)
+    for addr, data in memory.items():
+        proc.MEMORY_VIEW[addr:addr + len(data)] = data
+
+    if engine == "blocks":
+        proc.enable_block_cache()
+    elif engine == "jit":
+        proc.enable_jit()
+
+    return proc
+
+
+def run_program(proc: W65C02S, iterations: int) -> int:
+    start = proc.CYCLES
+    for _ in range(iterations):
+        proc.PC = BASE
+        proc.run_for_cycles(1 << 62)  # Until the 0x00 after the program
+
+    return proc.CYCLES - start
+
+
+def run(repeat: int = 3) -> dict:
+    results = {}
+
+    for name, build in PROGRAMS.items():
+        program, instructions, memory = build()
+
+        for engine in ENGINES:
+            proc = make_proc(engine, program, memory)
+            run_program(proc, ITERATIONS)  # Warm up caches and the JIT
+
+            cycles = run_program(proc, ITERATIONS)
+            seconds = best_of(lambda: run_program(proc, ITERATIONS), repeat)
+            results[f"program.{name}.{engine}"] = rates(seconds, instructions * ITERATIONS, cycles)
+
+    return results
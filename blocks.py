@@ -0,0 +1,203 @@
+import copy
+
+from bus import TRAP_CODE
+from opcodes import DISPATCH, MNEMONICS, MODES
+
+MAX_BLOCK_LENGTH = 64  # Maximum number of instructions in a single block
+MAX_BLOCK_CYCLES = MAX_BLOCK_LENGTH * 8  # Upper bound on the cycles a single block can take
+
+# Instructions that end a basic block
+BLOCK_END = frozenset((
+    "BPL", "BMI", "BVC", "BVS", "BCC", "BCS", "BNE", "BEQ", "BRA",
+    "JMP", "JSR", "RTS", "RTI", "BRK", "WAI", "STP",
+))
+
+# Instructions a polling loop may contain, they only read memory and change registers and flags
+POLL_SAFE = frozenset((
+    "LDA", "LDX", "LDY", "CMP", "CPX", "CPY", "AND", "ORA", "EOR", "BIT",
+    "ADC", "SBC", "TAX", "TXA", "TAY", "TYA", "TSX", "INX", "INY", "DEX", "DEY",
+    "CLC", "SEC", "CLV", "CLD", "SED", "NOP",
+    "BPL", "BMI", "BVC", "BVS", "BCC", "BCS", "BNE", "BEQ", "BRA", "JMP",
+))
+POLL_SAFE_ACCUMULATOR = frozenset(("ASL", "LSR", "ROL", "ROR"))  # Only in accumulator mode
+
+
+def read_pages(mnemonic: str, mode: str, operand: int) -> tuple | None:
+    # Pages an instruction reads data from, None when the address comes from a pointer in memory
+    if mnemonic in ("PLA", "PLX", "PLY", "PLP", "RTS", "RTI"):
+        return (0x01,)
+    if mode in ("I", "AA", "IA", "S", "PCR"):
+        return ()
+    if mode in ("ZP", "ZPIX", "ZPIY"):
+        return (0x00,)
+    if mode == "A":
+        return () if mnemonic in ("JMP", "JSR") else (operand >> 8,)  # Jump targets are not data
+    if mode in ("AIX", "AIY", "AI", "AII"):  # Index or pointer may carry into the next page
+        return (operand >> 8, ((operand >> 8) + 1) & 0xFF)
+    return None
+
+
+class BlockCache:
+    def __init__(self, proc) -> None:
+        self.proc = proc
+        self.blocks = {}  # Start PC -> tuple of (handler, operand, next PC, cycles, opcode)
+        self.page_blocks = [set() for _ in range(0x100)]  # Page -> start PCs of blocks that cover it
+        self.dirty = False  # Set when a write invalidates cached code or a device raised an event mid-block
+        self.polls = set()  # Start PCs of blocks without side effects, candidates for polling loops
+
+    def translate(self, pc: int) -> tuple | None:
+        memory = self.proc.MEMORY
+        ops = []
+        pages = set()
+        mnemonic = None
+
+        start = pc
+        while len(ops) < MAX_BLOCK_LENGTH:
+            opcode = memory[pc]
+            if opcode == 0x00:
+                break
+
+            handler, num_bytes, decode, cycles = DISPATCH[opcode]
+            operand = None if decode is None else decode(memory, pc)  # Operand fetches wrap at $FFFF
+            pages.update((pc >> 8, ((pc + num_bytes - 1) & 0xFFFF) >> 8))
+            pc = (pc + num_bytes) & 0xFFFF
+            ops.append((handler, operand, pc, cycles, opcode))
+
+            mnemonic = MNEMONICS[opcode]
+            if mnemonic is None or mnemonic in BLOCK_END:
+                break
+            mnemonic = None
+
+        if not ops:
+            return None
+
+        block = tuple(ops)
+        self.blocks[start] = block
+        if mnemonic in BLOCK_END and self._is_poll(block):  # Only a block ending in a jump can loop back
+            self.polls.add(start)
+
+        for page in pages:
+            self.page_blocks[page].add(start)
+            self.proc.WRITE_TRAPS[page] |= TRAP_CODE
+
+        return block
+
+    def _is_poll(self, block: tuple) -> bool:
+        # Fast-forwarding assumes what a poll reads only changes at a scheduled event, true for RAM, ROM
+        # and devices mapped as event driven, but not for e.g. a raster or timer register read on the fly,
+        # mapping pages flushes the cache so this holds as long as the block does
+        readers = self.proc.PAGE_READERS
+        event_pages = self.proc.EVENT_PAGES
+
+        for _, operand, _, _, opcode in block:
+            mnemonic, mode = MNEMONICS[opcode], MODES[opcode]
+            if mnemonic not in POLL_SAFE and not (mnemonic in POLL_SAFE_ACCUMULATOR and mode == "AA"):
+                return False
+
+            pages = read_pages(mnemonic, mode, operand)
+            if pages is None:
+                pages = range(0x100)
+            if not all(readers[page] is None or event_pages[page] for page in pages):
+                return False
+
+        return True
+
+    def invalidate_page(self, page: int) -> None:
+        for start in self.page_blocks[page]:
+            self.blocks.pop(start, None)
+            self.polls.discard(start)
+
+        self.page_blocks[page].clear()
+        self.proc.WRITE_TRAPS[page] &= ~TRAP_CODE
+        self.dirty = True
+
+    def fork(self, proc) -> "BlockCache":
+        # Blocks are immutable tuples, only the containers are copied
+        cache = copy.copy(self)
+        cache.proc = proc
+        cache.blocks = self.blocks.copy()
+        cache.page_blocks = [starts.copy() for starts in self.page_blocks]
+        cache.polls = self.polls.copy()
+        cache.dirty = False
+        return cache
+
+    def flush(self) -> None:
+        for page in range(0x100):
+            if self.page_blocks[page]:
+                self.invalidate_page(page)
+
+    def _interpret(self, block: tuple) -> None:
+        # Runs a block stopping at the first instruction boundary where code was modified or an event is due
+        proc = self.proc
+
+        for handler, operand, next_pc, base_cycles, _ in block:
+            proc.CYCLES += base_cycles
+
+            if operand is None:
+                handler(proc)
+            else:
+                handler(proc, operand)
+
+            proc.PC = next_pc
+
+            if self.dirty or proc.CYCLES >= proc.NEXT_EVENT:
+                break
+
+    def _run_poll(self, block: tuple, deadline: int) -> None:
+        # Runs a side-effect free block, when it branched back to itself without changing any register
+        # every further iteration is identical until an event or an interrupt, so those are skipped
+        proc = self.proc
+        start = proc.PC
+        state = (proc.A, proc.X, proc.Y, proc.P, proc.S)
+        before = proc.CYCLES
+
+        self._interpret(block)
+
+        if proc.PC != start or self.dirty or state != (proc.A, proc.X, proc.Y, proc.P, proc.S):
+            return
+
+        # Leave the last iteration before the limit to run normally so events land on the same boundary
+        period = proc.CYCLES - before
+        iterations = (min(proc.NEXT_EVENT, deadline) - proc.CYCLES) // period - 1
+        if iterations > 0:
+            proc.CYCLES += iterations * period
+
+    def run(self, cycles: int) -> int:
+        proc = self.proc
+        blocks = self.blocks
+        start = proc.CYCLES
+        deadline = start + cycles
+
+        while proc.CYCLES < deadline:
+            if proc.CYCLES >= proc.NEXT_EVENT and not proc.service_events(deadline):
+                break
+
+            block = blocks.get(proc.PC)
+            if block is None:
+                block = self.translate(proc.PC)
+                if block is None:
+                    break
+
+            self.dirty = False
+            if proc.PC in self.polls:
+                self._run_poll(block, deadline)
+                continue
+
+            if proc.NEXT_EVENT - proc.CYCLES < MAX_BLOCK_CYCLES:  # Event may be due inside the block
+                self._interpret(block)
+                continue
+
+            for handler, operand, next_pc, base_cycles, _ in block:
+                proc.CYCLES += base_cycles
+
+                if operand is None:
+                    handler(proc)
+                else:
+                    handler(proc, operand)
+
+                proc.PC = next_pc
+
+                if self.dirty:  # Self-modifying code or an interrupt, the rest of the block must not run yet
+                    break
+
+        return proc.CYCLES - start
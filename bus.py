@@ -0,0 +1,14 @@
+# WRITE_TRAPS bits, a page with no bits set is plain RAM written directly
+TRAP_CODE   = 0b00000001  # Page holds code cached by the block cache
+TRAP_MAPPED = 0b00000010  # Page is mapped as ROM or to a device
+
+PAGE_SIZE = 0x100
+NUM_PAGES = 0x100
+
+
+def rom_write(addr: int, val: int) -> None:
+    pass  # Writes to ROM are ignored
+
+
+def pages(start: int, end: int) -> range:
+    return range(start >> 8, (end >> 8) + 1)
@@ -1,4 +1,5 @@
 from addr_modes.handler import handle_adm
+from opcodes import INSTRUCTION_SET, OPCODES
 import instructions as instr
 
 def draw_flags(flags: int) -> None:
@@ -33,7 +34,7 @@ def print_memory(proc: "W65C02S", addr1: int, addr2: int) -> None:
     num_rows = (addr2 - addr1) // 16
 
     if num_rows == 0:
-        values = " ".join([f"{val:02X}" for val in proc.MEMORY[addr1:addr2 + 1]])
+        values = proc.mem_view(addr1, addr2).hex(" ").upper()
         print(f"{addr1:04X}-{addr2:04X}: {values}")
 
     if num_rows >= 1:
@@ -44,7 +45,7 @@ def print_memory(proc: "W65C02S", addr1: int, addr2: int) -> None:
             row_end_addr = addr1 + (0x000F - addr1_offset)
 
             spaces = " ".join(["  " for _ in range(addr1_offset)])
-            values = " ".join([f"{val:02X}" for val in proc.MEMORY[addr1:row_end_addr + 1]])
+            values = proc.mem_view(addr1, row_end_addr).hex(" ").upper()
 
             print(f"{addr1:04X}-{row_end_addr:04X}: {spaces} {values}")
 
@@ -52,7 +53,7 @@ def print_memory(proc: "W65C02S", addr1: int, addr2: int) -> None:
         for _ in range(num_rows + 1):
             row_end_addr = row_start_addr + 0x000F
 
-            values = " ".join([f"{val:02X}" for val in proc.MEMORY[row_start_addr:row_end_addr + 1]])
+            values = proc.mem_view(row_start_addr, row_end_addr).hex(" ").upper()
             print(f"{row_start_addr:04X}-{row_end_addr:04X}: {values}")
 
             row_start_addr = row_end_addr + 0x0001
@@ -62,11 +63,34 @@ def print_memory(proc: "W65C02S", addr1: int, addr2: int) -> None:
             row_start_addr = addr2 - addr2_offset
 
             spaces = " ".join(["  " for _ in range(0x000F - addr2_offset)])
-            values = " ".join([f"{val:02X}" for val in proc.MEMORY[row_start_addr:addr2 + 1]])
+            values = proc.mem_view(row_start_addr, addr2).hex(" ").upper()
 
             print(f"{row_start_addr:04X}-{addr2:04X}: {values} {spaces}")
 
 
+def parse_condition(expr: str):
+    # Breakpoint condition over the registers, e.g. "A == 0x05 and X > 3"
+    code = compile(expr, "<condition>", "eval")
+    registers = ("A", "X", "Y", "S", "P", "PC", "CYCLES")
+
+    def condition(proc: "W65C02S") -> bool:
+        return bool(eval(code, {"__builtins__": {}}, {reg: getattr(proc, reg) for reg in registers}))
+
+    return condition
+
+
+def print_stop(proc: "W65C02S") -> None:
+    if proc.STOP_REASON is None:
+        print(f"Stopped at {proc.PC:04X}")
+        return
+
+    reason, addr = proc.STOP_REASON
+    if reason == "break":
+        print(f"Breakpoint at {addr:04X}")
+    else:
+        print(f"Watchpoint: {reason} {addr:04X}, stopped at {proc.PC:04X}")
+
+
 def w65c02s_interface(proc: "W65C02S") -> None:
     running = True
     while running:
@@ -94,7 +118,7 @@ def w65c02s_interface(proc: "W65C02S") -> None:
 
             is_opcode = True
         except ValueError:
-            if instruction.upper() in proc.INSTRUCTION_SET.keys():
+            if instruction.upper() in INSTRUCTION_SET:
                 is_opcode = True
 
         if is_opcode:
@@ -115,9 +139,9 @@ def w65c02s_interface(proc: "W65C02S") -> None:
                     args[1] = args[1].strip()
 
             if isinstance(instruction, int):
-                if instruction in proc.OPCODES:
+                if instruction in OPCODES:
                     # TODO: implement execute_opcode for all available instructions
-                    getattr(instr, proc.OPCODES[instruction].lower()).execute_opcode(proc, *args)
+                    getattr(instr, OPCODES[instruction].lower()).execute_opcode(proc, *args)
                 continue
 
             if "_" in instruction:
@@ -241,7 +265,7 @@ def w65c02s_interface(proc: "W65C02S") -> None:
                 print_memory(proc, addr1, addr2)
 
         elif instruction == "!stk":
-            STACK = proc.MEMORY[proc.STACK_START:proc.STACK_END + 1]
+            STACK = proc.mem_view(proc.STACK_START, proc.STACK_END)
 
             if len(args) == 1:
                 if args[0] == "pull":
@@ -271,6 +295,87 @@ def w65c02s_interface(proc: "W65C02S") -> None:
 
                     proc.stk_push(val)
 
+        elif instruction == "!break":
+            if len(args) == 0:
+                for addr in range(0x10000):
+                    if proc.BREAKPOINTS[addr]:
+                        condition = " if condition" if addr in proc.BREAK_CONDITIONS else ""
+                        print(f"{addr:04X}{condition}")
+                continue
+
+            if args[0] == "clear":
+                proc.clear_breakpoint()
+                continue
+
+            try:
+                if args[0] == "del" and len(args) == 2:
+                    proc.clear_breakpoint(int(args[1], 16))
+                    continue
+
+                addr = int(args[0].strip(), 16)
+                condition = parse_condition(" ".join(args[1:]).strip()) if len(args) > 1 else None
+            except (ValueError, SyntaxError):
+                continue
+
+            proc.set_breakpoint(addr, condition)
+
+        elif instruction == "!watch":
+            if len(args) == 0:
+                for addr in range(0x10000):
+                    if proc.WATCH_READS[addr] or proc.WATCH_WRITES[addr]:
+                        kind = ("r" if proc.WATCH_READS[addr] else "") + ("w" if proc.WATCH_WRITES[addr] else "")
+                        print(f"{addr:04X} {kind}")
+                continue
+
+            if args[0] == "clear":
+                proc.clear_watchpoint()
+                continue
+
+            try:
+                if args[0] == "del" and len(args) == 2:
+                    proc.clear_watchpoint(int(args[1], 16))
+                    continue
+
+                addr = int(args[0].strip(), 16)
+            except ValueError:
+                continue
+
+            kind = args[1].strip().lower() if len(args) == 2 else "w"
+            proc.set_watchpoint(addr, read="r" in kind, write="w" in kind)
+
+        elif instruction == "!run":
+            if len(args) == 0:
+                proc.execute_from_memory()
+            else:
+                try:
+                    cycles = int(args[0])
+                except ValueError:
+                    continue
+
+                proc.run_for_cycles(cycles)
+
+            print_stop(proc)
+
+        elif instruction == "!prof":
+            if len(args) == 0:
+                if proc.PROFILER is None:
+                    print("Profiler is off, enable it with !prof on")
+                    continue
+
+                print(proc.PROFILER.report())
+                continue
+
+            if args[0] == "on":
+                proc.enable_profiler()
+            elif args[0] == "off":
+                proc.disable_profiler()
+            elif proc.PROFILER is None:
+                print("Profiler is off, enable it with !prof on")
+            elif args[0] == "clear":
+                proc.PROFILER.clear()
+            else:
+                proc.PROFILER.dump(args[0])
+
         elif instruction == "!flush":
             allowed_fields = {
                 "A": 0x00,
@@ -279,7 +384,8 @@ def w65c02s_interface(proc: "W65C02S") -> None:
                 "PC": 0x0000,
                 "S": 0xFD,
                 "P": 0b00100100,
-                "MEMORY": [0x00] * 0x10000
+                "CYCLES": 0,
+                "MEMORY": bytes(0x10000)
             }
 
             if len(args) == 0:
@@ -290,10 +396,17 @@ def w65c02s_interface(proc: "W65C02S") -> None:
                 proc.PC = 0x0000
                 proc.S = 0xFD
                 proc.P = 0b00100100
+                proc.CYCLES = 0
 
-                proc.MEMORY = [0x00] * 0x10000
+                proc.MEMORY_VIEW[:] = allowed_fields["MEMORY"]
+                if proc.BLOCK_CACHE is not None:
+                    proc.BLOCK_CACHE.flush()
                 continue
 
             for arg in args:
-                if arg.upper() in allowed_fields.keys():
+                if arg.upper() == "MEMORY":
+                    proc.MEMORY_VIEW[:] = allowed_fields["MEMORY"]
+                    if proc.BLOCK_CACHE is not None:
+                        proc.BLOCK_CACHE.flush()
+                elif arg.upper() in allowed_fields.keys():
                     proc.__setattr__(arg.upper(), allowed_fields[arg.upper()])
@@ -0,0 +1,239 @@
+import argparse
+import mmap
+import re
+import sys
+
+from opcodes import OPCODE_MAP
+
+# Operand syntax of every addressing mode, in the form asm_to_bin.py reads back,
+# formatted with the operand and the address a branch goes to
+OPERAND_FORMATS = {
+    "I":     "",
+    "AA":    "A",
+    "IA":    "#${0:02X}",
+    "ZP":    "${0:02X}",
+    "ZPIX":  "${0:02X},X",
+    "ZPIY":  "${0:02X},Y",
+    "ZPII":  "(${0:02X},X)",
+    "ZPIIY": "(${0:02X}),Y",
+    "ZPI":   "(${0:02X})",
+    "A":     "${0:04X}",
+    "AIX":   "${0:04X},X",
+    "AIY":   "${0:04X},Y",
+    "AI":    "(${0:04X})",
+    "AII":   "(${0:04X},X)",
+    "PCR":   "${1:04X}",
+    "ZPPCR": "${0:02X},${1:04X}",
+}
+BRANCH_MODES = frozenset(("PCR", "ZPPCR"))  # The last operand byte is a signed offset from the next instruction
+
+# Same syntax with a label in place of the address, or of the branch target
+LABEL_FORMATS = {
+    mode: fmt.replace("${1:04X}", "{2}") if mode in BRANCH_MODES
+    else fmt.replace("${0:02X}", "{2}").replace("${0:04X}", "{2}")
+    for mode, fmt in OPERAND_FORMATS.items() if "$" in fmt and not fmt.startswith("#")
+}
+
+# Instruction length of every opcode, from the full opcode map so unimplemented instructions decode too
+LENGTHS = tuple(syntax.length for syntax in OPCODE_MAP)
+# Complete instruction syntax of every opcode
+INSTRUCTION_FORMATS = tuple(
+    f"{syntax.mnemonic} {OPERAND_FORMATS[syntax.mode]}".rstrip() for syntax in OPCODE_MAP
+)
+
+FLOW_END = frozenset(("JMP", "BRA", "RTS", "RTI", "BRK", "STP"))  # Execution never falls through these
+VECTORS = (("NMI", 0xFFFA), ("RESET", 0xFFFC), ("IRQ", 0xFFFE))
+DATA_ROW = 8  # Bytes per .BYTE line of data found by recursive descent
+OUTPUT_BUFFER_SIZE = 1 << 20  # 1 MB write buffer for the listing
+
+LABEL_LINE = re.compile(r"([A-Za-z_][A-Za-z0-9_]*)\s*=\s*\$([0-9A-Fa-f]{1,4})")
+
+CODE_START = 1  # First byte of an instruction reached from an entry point
+CODE_BODY = 2  # Operand byte of such an instruction
+
+
+def branch_target(addr: int, length: int, offset: int) -> int:
+    return (addr + length + offset - ((offset & 0x80) << 1)) & 0xFFFF
+
+
+def format_instruction(opcode: int, operands, labels: dict = None, addr: int = 0x0000) -> str:
+    mnemonic, mode, length = OPCODE_MAP[opcode]
+    operand = target = int.from_bytes(operands, "little")
+    if mode in BRANCH_MODES:
+        operand, target = operands[0], branch_target(addr, length, operands[-1])
+
+    if labels and target in labels and mode in LABEL_FORMATS:
+        return f"{mnemonic} {LABEL_FORMATS[mode].format(operand, target, labels[target])}"
+
+    return INSTRUCTION_FORMATS[opcode].format(operand, target)
+
+
+def format_data(data) -> str:
+    return ".BYTE " + ",".join(f"${byte:02X}" for byte in data)
+
+
+def load_labels(path: str) -> dict:
+    # Address -> name from "NAME = $ADDR" lines, ";" starts a comment
+    labels = {}
+    with open(path, "r") as labels_file:
+        for line in labels_file:
+            line = line.split(";", 1)[0].strip()
+            if not line:
+                continue
+
+            match = LABEL_LINE.fullmatch(line)
+            if match is None:
+                raise ValueError(f"Invalid label line: {line}")
+            labels.setdefault(int(match.group(2), 16), match.group(1))
+
+    return labels
+
+
+def sweep(image, base: int = 0x0000, start: int = 0, end: int = None, bank_size: int = 0x10000):
+    # Linear sweep, yields (offset, address, instruction bytes) with every byte decoded as code,
+    # the image is split into banks of bank_size bytes that are all mapped at base
+    view = memoryview(image)
+    end = len(view) if end is None else min(end, len(view))
+    lengths = LENGTHS
+
+    offset = start
+    while offset < end:
+        bank_start = offset - offset % bank_size
+        limit = min(end, bank_start + bank_size)  # Instructions never cross a bank boundary
+
+        while offset < limit:
+            length = lengths[view[offset]]
+            if offset + length > limit:
+                length = 1  # Truncated instruction, the remaining bytes are data
+
+            yield offset, (base + offset - bank_start) & 0xFFFF, view[offset:offset + length]
+            offset += length
+
+
+def trace_code(image, base: int = 0x0000, entries=()) -> bytearray:
+    # Recursive descent from the entry addresses, returns a CODE_START/CODE_BODY map of the image,
+    # branches, JMP and JSR are followed to their targets, JMP (a) when its pointer is in the image
+    view = memoryview(image)
+    code = bytearray(len(view))
+    pending = list(entries)
+
+    while pending:
+        offset = pending.pop() - base
+        while 0 <= offset < len(view) and not code[offset]:
+            mnemonic, mode, length = OPCODE_MAP[view[offset]]
+            if offset + length > len(view):
+                break  # Truncated instructions are data
+
+            code[offset] = CODE_START
+            code[offset + 1:offset + length] = bytes((CODE_BODY,)) * (length - 1)
+
+            addr = (base + offset) & 0xFFFF
+            operand = int.from_bytes(view[offset + 1:offset + length], "little")
+            if mode in BRANCH_MODES:
+                pending.append(branch_target(addr, length, view[offset + length - 1]))
+            elif mnemonic in ("JMP", "JSR") and mode == "A":
+                pending.append(operand)
+            elif mnemonic == "JMP" and mode == "AI" and 0 <= operand - base < len(view) - 1:
+                pending.append(view[operand - base] | view[operand - base + 1] << 8)
+
+            if mnemonic in FLOW_END:
+                break
+
+            offset += length
+
+    return code
+
+
+def vector_entries(image, base: int = 0x0000) -> dict:
+    # Name -> address of every interrupt vector that lies inside the image
+    entries = {}
+    for name, vector in VECTORS:
+        offset = vector - base
+        if 0 <= offset and offset + 1 < len(image):
+            entries[name] = image[offset] | (image[offset + 1] << 8)
+
+    return entries
+
+
+def descend(image, base: int = 0x0000, entries=()):
+    # Yields (offset, address, bytes, is_code), code reached from the entry points as instructions
+    # and everything else as rows of data
+    view = memoryview(image)
+    code = trace_code(view, base, entries)
+
+    offset = 0
+    while offset < len(view):
+        if code[offset] == CODE_START:
+            length = LENGTHS[view[offset]]
+            yield offset, (base + offset) & 0xFFFF, view[offset:offset + length], True
+            offset += length
+            continue
+
+        end = offset + 1
+        while end < len(view) and end - offset < DATA_ROW and code[end] != CODE_START:
+            end += 1
+        yield offset, (base + offset) & 0xFFFF, view[offset:end], False
+        offset = end
+
+
+def render(addr: int, data, is_code: bool = True, labels: dict = None, bank: int = None) -> str:
+    prefix = f"{addr:04X}" if bank is None else f"{bank:02X}:{addr:04X}"
+    if is_code and len(data) == LENGTHS[data[0]]:
+        text = format_instruction(data[0], data[1:], labels, addr)
+    else:  # Data, or an instruction cut off by the end of the image
+        text = format_data(data)
+    line = f"{prefix}  {data.hex(' ').upper():<8}  {text}\n"
+
+    if labels and addr in labels:
+        return f"{labels[addr]}:\n{line}"
+    return line
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("W65C02S disassembler")
+    parser.add_argument("rom", type=str, help="binary image to disassemble")
+    parser.add_argument("--base", dest="base", type=lambda val: int(val, 16), default=0x8000,
+                        help="hex address the image (or every bank) is mapped at")
+    parser.add_argument("--bank-size", dest="bank_size", type=lambda val: int(val, 16),
+                        help="hex size of the banks of a banked image, all mapped at the base address")
+    parser.add_argument("--bank", dest="bank", type=int, default=-1,
+                        help="bank to follow with --descent, the last bank by default")
+    parser.add_argument("--descent", dest="descent", action="store_true",
+                        help="follow code from the reset, IRQ and NMI vectors and show the rest as data")
+    parser.add_argument("--entry", dest="entries", action="append", type=lambda val: int(val, 16), default=[],
+                        help="hex address of an extra entry point for --descent, can be repeated")
+    parser.add_argument("--labels", dest="labels", type=str, help="file of NAME = $ADDR label definitions")
+    _args = parser.parse_args()
+
+    _labels = {} if _args.labels is None else load_labels(_args.labels)
+
+    with open(_args.rom, "rb") as _rom_file:
+        # Mapped rather than read, multi-megabyte images are paged in as the sweep reaches them
+        try:
+            _view = memoryview(mmap.mmap(_rom_file.fileno(), 0, access=mmap.ACCESS_READ))
+        except ValueError:  # Empty files can't be mapped
+            _view = memoryview(b"")
+
+        _bank_size = _args.bank_size or max(len(_view), 1)
+        _banked = _args.bank_size is not None
+
+        if _args.descent:
+            _bank = _args.bank % max(-(-len(_view) // _bank_size), 1)
+            _bank_view = _view[_bank * _bank_size:(_bank + 1) * _bank_size]
+
+            _vectors = vector_entries(_bank_view, _args.base)
+            for _name, _addr in _vectors.items():
+                _labels.setdefault(_addr, _name)
+
+            _records = (
+                render(_addr, _data, _is_code, _labels, _bank if _banked else None)
+                for _offset, _addr, _data, _is_code in descend(_bank_view, _args.base, [*_vectors.values(), *_args.entries])
+            )
+        else:
+            _records = (
+                render(_addr, _data, True, _labels, _offset // _bank_size if _banked else None)
+                for _offset, _addr, _data in sweep(_view, _args.base, bank_size=_bank_size)
+            )
+
+        with open(sys.stdout.fileno(), "w", buffering=OUTPUT_BUFFER_SIZE, closefd=False) as _output:
+            _output.writelines(_records)
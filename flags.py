@@ -0,0 +1,27 @@
+CARRY           = 0b00000001  # Carry 1 = True
+ZERO            = 0b00000010  # Zero 1 = True
+IRQB_DISABLE    = 0b00000100  # IRQB disable 1 = disable
+DECIMAL         = 0b00001000  # Decimal mode 1 = True
+BRK_COMMAND     = 0b00010000  # BRK command 1 = BRK, 0 = IRQB
+OVERFLOW        = 0b01000000  # Overflow 1 = True
+NEGATIVE        = 0b10000000  # Negative 1 = True
+
+NZ      = NEGATIVE | ZERO
+NVZC    = NZ | OVERFLOW | CARRY
+
+FLAG_BITS = {
+    "C": CARRY,
+    "Z": ZERO,
+    "I": IRQB_DISABLE,
+    "D": DECIMAL,
+    "B": BRK_COMMAND,
+    "V": OVERFLOW,
+    "N": NEGATIVE,
+}
+
+# N and Z bits of P for every possible result byte
+NZ_FLAGS = tuple((val & NEGATIVE) | (ZERO if val == 0 else 0) for val in range(0x100))
+
+
+def carry_flag(carry: bool) -> int:
+    return CARRY if carry else 0
@@ -1,6 +1,8 @@
 import importlib
 
 from instructions.nop import *
+from instructions.wai import *
+from instructions.stp import *
 
 from instructions.clc import *
 from instructions.sec import *
@@ -51,10 +53,10 @@ from instructions.ror import *
 
 
 __all__ = [
-    "nop",
+    "nop", "wai", "stp",
     "clc", "sec", "cli", "sei", "clv", "cld", "sed",
     "txa", "tax", "tya", "tay", "inx", "iny", "dex", "dey",
-    "txs", "tsx", "pha", "plp", "php", "plp",
+    "txs", "tsx", "pha", "pla", "php", "plp",
     "lda", "ldx", "ldy", "sta", "stx", "sty",
     "inc", "dec", "adc", "sbc", "and_", "ora", "eor", "cmp", "cpx", "cpy",
     "asl", "lsr", "rol", "ror", 
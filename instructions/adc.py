@@ -1,3 +1,6 @@
+import alu
+from flags import CARRY, DECIMAL, NVZC
+
 INSTRUCTION = "ADC"
 
 ADM_IA      = 0x69
@@ -10,125 +13,56 @@ ADM_ZPII    = 0x61
 ADM_ZPIIY   = 0x71
 
 
-def _check_overflow(proc, a: int, b: int, result: int) -> bool:
-    a_s = proc.signed_byte(a)
-    b_s = proc.signed_byte(b)
-    res = proc.signed_byte(result)
-
-    return (a_s > 0 and b_s > 0 and res < 0) or (a_s < 0 and b_s < 0 and res > 0)
+def _add(proc, val: int) -> None:
+    if proc.P_RAW & DECIMAL:  # Extra cycle in decimal mode
+        proc.CYCLES += 1
 
+    p = proc.P_RAW
+    result = alu.ADC_TABLE[(p & CARRY | (p & DECIMAL) >> 2) << 16 | proc.A << 8 | val]
 
-def ia(proc, value: int) -> None:
-    carry = proc.P & 0x00000001
-
-    result = proc.A + value + carry
+    proc.A = result & 0xFF
+    proc.P_RAW = (proc.P_RAW & ~NVZC) | (result >> 8)
+    proc.NZ_RESULT = None  # N and Z come from the table
 
-    overflow = _check_overflow(proc, proc.A, value, result)
-    carry_out = result > 0xFF 
 
-    proc.A = proc.unsigned_byte(result)
-
-    proc.set_flags(
-        "C" if carry_out else "!C",
-        "Z" if not bool(proc.A) else "!Z",
-        "V" if overflow else "!V",
-        "N" if bool(proc.A & 0b10000000) else "!N"
-    )
+def ia(proc, value: int) -> None:
+    _add(proc, value & 0xFF)
 
 
 def zp(proc, zp_addr: int) -> None:
     mem_val = proc.mem_read(zp_addr & 0xFF)
-    carry = proc.P & 0x00000001
-
-    result = proc.A + mem_val + carry
-    
-    overflow = _check_overflow(proc, proc.A, mem_val, result)
-    carry_out = result > 0xFF 
 
-    proc.A = proc.unsigned_byte(result)
-
-    proc.set_flags(
-        "C" if carry_out else "!C",
-        "Z" if not bool(proc.A) else "!Z",
-        "V" if overflow else "!V",
-        "N" if bool(proc.A & 0b10000000) else "!N"
-    )
+    _add(proc, mem_val)
 
 
 def zpix(proc, zp_addr: int) -> None:
     val = proc.mem_read((zp_addr + proc.X) & 0xFF)
-    carry = proc.P & 0x00000001
-
-    result = proc.A + val + carry
-    
-    overflow = _check_overflow(proc, proc.A, val, result)
-    carry_out = result > 0xFF 
 
-    proc.A = proc.unsigned_byte(result)
-
-    proc.set_flags(
-        "C" if carry_out else "!C",
-        "Z" if not bool(proc.A) else "!Z",
-        "V" if overflow else "!V",
-        "N" if bool(proc.A & 0b10000000) else "!N"
-    )
+    _add(proc, val)
 
 
 def a(proc, addr: int) -> None:
     val = proc.mem_read(addr & 0xFFFF)
-    carry = proc.P & 0x00000001
-
-    result = proc.A + val + carry
-    
-    overflow = _check_overflow(proc, proc.A, val, result)
-    carry_out = result > 0xFF 
 
-    proc.A = proc.unsigned_byte(result)
-
-    proc.set_flags(
-        "C" if carry_out else "!C",
-        "Z" if not bool(proc.A) else "!Z",
-        "V" if overflow else "!V",
-        "N" if bool(proc.A & 0b10000000) else "!N"
-    )
+    _add(proc, val)
 
 
 def aix(proc, addr: int) -> None:
-    val = proc.mem_read((addr + proc.X) & 0xFFFF)
-    carry = proc.P & 0x00000001
-
-    result = proc.A + val + carry
-    
-    overflow = _check_overflow(proc, proc.A, val, result)
-    carry_out = result > 0xFF 
+    if (addr & 0xFF) + proc.X > 0xFF:  # Page boundary crossed
+        proc.CYCLES += 1
 
-    proc.A = proc.unsigned_byte(result)
+    val = proc.mem_read((addr + proc.X) & 0xFFFF)
 
-    proc.set_flags(
-        "C" if carry_out else "!C",
-        "Z" if not bool(proc.A) else "!Z",
-        "V" if overflow else "!V",
-        "N" if bool(proc.A & 0b10000000) else "!N"
-    )
+    _add(proc, val)
 
 
 def aiy(proc, addr: int) -> None:
-    val = proc.mem_read((addr + proc.Y) & 0xFFFF)
-    carry = proc.P & 0x00000001
+    if (addr & 0xFF) + proc.Y > 0xFF:  # Page boundary crossed
+        proc.CYCLES += 1
 
-    result = proc.A + val + carry
-    
-    overflow = _check_overflow(proc, proc.A, val, result)
-    carry_out = result > 0xFF 
-
-    proc.A = proc.unsigned_byte(result)
+    val = proc.mem_read((addr + proc.Y) & 0xFFFF)
 
-    proc.set_flags(
-        "C" if carry_out else "!C",
-        "Z" if not bool(proc.A) else "!Z",
-        "V" if overflow else "!V",
-        "N" if bool(proc.A & 0b10000000) else "!N"
-    )
+    _add(proc, val)
 
 
 def zpii(proc, zp_addr: int) -> None:
@@ -136,42 +70,18 @@ def zpii(proc, zp_addr: int) -> None:
     eff_addr = ((proc.MEMORY[ind_addr + 1] << 8) + proc.MEMORY[ind_addr])
 
     val = proc.mem_read(eff_addr & 0xFFFF)
-    carry = proc.P & 0x00000001
 
-    result = proc.A + val + carry
-    
-    overflow = _check_overflow(proc, proc.A, val, result)
-    carry_out = result > 0xFF 
-
-    proc.A = proc.unsigned_byte(result)
-
-    proc.set_flags(
-        "C" if carry_out else "!C",
-        "Z" if not bool(proc.A) else "!Z",
-        "V" if overflow else "!V",
-        "N" if bool(proc.A & 0b10000000) else "!N"
-    )
+    _add(proc, val)
 
 
 def zpiiy(proc, zp_addr: int) -> None:
     ind_addr = zp_addr & 0xFF
     eff_addr = ((proc.MEMORY[ind_addr + 1] << 8) + proc.MEMORY[ind_addr])
+    if (eff_addr & 0xFF) + proc.Y > 0xFF:  # Page boundary crossed
+        proc.CYCLES += 1
     val = proc.mem_read((eff_addr + proc.Y) & 0xFFFF)
-    carry = proc.P & 0x00000001
-
-    result = proc.A + val + carry
-    
-    overflow = _check_overflow(proc, proc.A, val, result)
-    carry_out = result > 0xFF 
 
-    proc.A = proc.unsigned_byte(result)
-
-    proc.set_flags(
-        "C" if carry_out else "!C",
-        "Z" if not bool(proc.A) else "!Z",
-        "V" if overflow else "!V",
-        "N" if bool(proc.A & 0b10000000) else "!N"
-    )
+    _add(proc, val)
 
 
 def execute_adm(adm: str, proc = None, operand: int = None) -> None:
@@ -212,16 +122,33 @@ def execute_opcode(proc, opcode: int, *args) -> None:
         zpiiy(proc, args[0])
 
 
+OPCODE_BYTES = {
+    ADM_IA:     2,
+    ADM_ZP:     2,
+    ADM_ZPIX:   2,
+    ADM_A:      3,
+    ADM_AIX:    3,
+    ADM_AIY:    3,
+    ADM_ZPII:   2,
+    ADM_ZPIIY:  2,
+}
+
+
 def get_opcode_bytes(opcode: int) -> int | None:
-    opcodes = {
-        ADM_IA:     2,
-        ADM_ZP:     2,
-        ADM_ZPIX:   2,
-        ADM_A:      3,
-        ADM_AIX:    3,
-        ADM_AIY:    3,
-        ADM_ZPII:   2,
-        ADM_ZPIIY:  2,
-    }
-
-    return opcodes.get(opcode)
+    return OPCODE_BYTES.get(opcode)
+
+
+OPCODE_CYCLES = {
+    ADM_IA:     2,
+    ADM_ZP:     3,
+    ADM_ZPIX:   4,
+    ADM_A:      4,
+    ADM_AIX:    4,
+    ADM_AIY:    4,
+    ADM_ZPII:   6,
+    ADM_ZPIIY:  5,
+}
+
+
+def get_opcode_cycles(opcode: int) -> int | None:
+    return OPCODE_CYCLES.get(opcode)
@@ -1,9 +1,11 @@
+from flags import CARRY
+
 INSTRUCTION = "CLC"
 
 ADM_I = 0x18
 
 def i(proc) -> None:
-    proc.set_flags("!C")
+    proc.P_RAW &= ~CARRY
 
 def execute_adm(adm: str, proc = None, operand: int = None) -> None:
     if adm == "I":
@@ -12,9 +14,16 @@ def execute_adm(adm: str, proc = None, operand: int = None) -> None:
 def execute_opcode() -> None:
     pass
 
+OPCODE_BYTES = {
+    ADM_I: 1,
+}
+
 def get_opcode_bytes(opcode: int) -> int | None:
-    opcodes = {
-        ADM_I: 1,
-    }
+    return OPCODE_BYTES.get(opcode)
+
+OPCODE_CYCLES = {
+    ADM_I: 2,
+}
 
-    return opcodes.get(opcode)
+def get_opcode_cycles(opcode: int) -> int | None:
+    return OPCODE_CYCLES.get(opcode)
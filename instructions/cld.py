@@ -1,9 +1,11 @@
+from flags import DECIMAL
+
 INSTRUCTION = "CLD"
 
 ADM_I = 0xD8
 
 def i(proc) -> None:
-    proc.set_flags("!D")
+    proc.P_RAW &= ~DECIMAL
 
 def execute_adm(adm: str, proc, operand: int = None) -> None:
     if adm == "I":
@@ -12,9 +14,16 @@ def execute_adm(adm: str, proc, operand: int = None) -> None:
 def execute_opcode() -> None:
     pass
 
+OPCODE_BYTES = {
+    ADM_I: 1,
+}
+
 def get_opcode_bytes(opcode: int) -> int | None:
-    opcodes = {
-        ADM_I: 1,
-    }
+    return OPCODE_BYTES.get(opcode)
+
+OPCODE_CYCLES = {
+    ADM_I: 2,
+}
 
-    return opcodes.get(opcode)
+def get_opcode_cycles(opcode: int) -> int | None:
+    return OPCODE_CYCLES.get(opcode)
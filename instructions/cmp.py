@@ -1,3 +1,5 @@
+from flags import CARRY, carry_flag
+
 INSTRUCTION = "CMP"
 
 ADM_IA      = 0xC9
@@ -11,97 +13,61 @@ ADM_ZPIIY   = 0xD1
 
 
 def ia(proc, value: int) -> None:
-    a_s = proc.signed_byte(proc.A)
-    v_s = proc.signed_byte(value & 0xFF)
-
-    carry = a_s >= v_s
-    zero = a_s == v_s
+    result = proc.A - (value & 0xFF)
 
-    proc.set_flags(
-        "C" if carry else "!C",
-        "Z" if zero else "!Z",
-        "N" if bool(proc.A & 0b10000000) else "!N"
-    )
+    proc.P_RAW = (proc.P_RAW & ~CARRY) | carry_flag(result >= 0)
+    proc.NZ_RESULT = result & 0xFF
 
 
 def zp(proc, zp_addr: int) -> None:
     mem_val = proc.mem_read(zp_addr & 0xFF)
 
-    a_s = proc.signed_byte(proc.A)
-    v_s = proc.signed_byte(mem_val)
-
-    carry = a_s >= v_s
-    zero = a_s == v_s
+    result = proc.A - mem_val
 
-    proc.set_flags(
-        "C" if carry else "!C",
-        "Z" if zero else "!Z",
-        "N" if bool(proc.A & 0b10000000) else "!N"
-    )
+    proc.P_RAW = (proc.P_RAW & ~CARRY) | carry_flag(result >= 0)
+    proc.NZ_RESULT = result & 0xFF
 
 
 def zpix(proc, zp_addr: int) -> None:
     val = proc.mem_read((zp_addr + proc.X) & 0xFF)
 
-    a_s = proc.signed_byte(proc.A)
-    v_s = proc.signed_byte(val)
+    result = proc.A - val
 
-    carry = a_s >= v_s
-    zero = a_s == v_s
-
-    proc.set_flags(
-        "C" if carry else "!C",
-        "Z" if zero else "!Z",
-        "N" if bool(proc.A & 0b10000000) else "!N"
-    )
+    proc.P_RAW = (proc.P_RAW & ~CARRY) | carry_flag(result >= 0)
+    proc.NZ_RESULT = result & 0xFF
 
 
 def a(proc, addr: int) -> None:
     val = proc.mem_read(addr & 0xFFFF)
 
-    a_s = proc.signed_byte(proc.A)
-    v_s = proc.signed_byte(val)
-
-    carry = a_s >= v_s
-    zero = a_s == v_s
+    result = proc.A - val
 
-    proc.set_flags(
-        "C" if carry else "!C",
-        "Z" if zero else "!Z",
-        "N" if bool(proc.A & 0b10000000) else "!N"
-    )
+    proc.P_RAW = (proc.P_RAW & ~CARRY) | carry_flag(result >= 0)
+    proc.NZ_RESULT = result & 0xFF
 
 
 def aix(proc, addr: int) -> None:
-    val = proc.mem_read((addr + proc.X) & 0xFFFF)
+    if (addr & 0xFF) + proc.X > 0xFF:  # Page boundary crossed
+        proc.CYCLES += 1
 
-    a_s = proc.signed_byte(proc.A)
-    v_s = proc.signed_byte(val)
+    val = proc.mem_read((addr + proc.X) & 0xFFFF)
 
-    carry = a_s >= v_s
-    zero = a_s == v_s
+    result = proc.A - val
 
-    proc.set_flags(
-        "C" if carry else "!C",
-        "Z" if zero else "!Z",
-        "N" if bool(proc.A & 0b10000000) else "!N"
-    )
+    proc.P_RAW = (proc.P_RAW & ~CARRY) | carry_flag(result >= 0)
+    proc.NZ_RESULT = result & 0xFF
 
 
 def aiy(proc, addr: int) -> None:
-    val = proc.mem_read((addr + proc.Y) & 0xFFFF)
+    if (addr & 0xFF) + proc.Y > 0xFF:  # Page boundary crossed
+        proc.CYCLES += 1
 
-    a_s = proc.signed_byte(proc.A)
-    v_s = proc.signed_byte(val)
+    val = proc.mem_read((addr + proc.Y) & 0xFFFF)
 
-    carry = a_s >= v_s
-    zero = a_s == v_s
+    result = proc.A - val
 
-    proc.set_flags(
-        "C" if carry else "!C",
-        "Z" if zero else "!Z",
-        "N" if bool(proc.A & 0b10000000) else "!N"
-    )
+    proc.P_RAW = (proc.P_RAW & ~CARRY) | carry_flag(result >= 0)
+    proc.NZ_RESULT = result & 0xFF
 
 
 def zpii(proc, zp_addr: int) -> None:
@@ -109,35 +75,23 @@ def zpii(proc, zp_addr: int) -> None:
     eff_addr = ((proc.MEMORY[ind_addr + 1] << 8) + proc.MEMORY[ind_addr])
     val = proc.mem_read(eff_addr & 0xFFFF)
 
-    a_s = proc.signed_byte(proc.A)
-    v_s = proc.signed_byte(val)
+    result = proc.A - val
 
-    carry = a_s >= v_s
-    zero = a_s == v_s
-
-    proc.set_flags(
-        "C" if carry else "!C",
-        "Z" if zero else "!Z",
-        "N" if bool(proc.A & 0b10000000) else "!N"
-    )
+    proc.P_RAW = (proc.P_RAW & ~CARRY) | carry_flag(result >= 0)
+    proc.NZ_RESULT = result & 0xFF
 
 
 def zpiiy(proc, zp_addr: int) -> None:
     ind_addr = zp_addr & 0xFF
     eff_addr = ((proc.MEMORY[ind_addr + 1] << 8) + proc.MEMORY[ind_addr])
+    if (eff_addr & 0xFF) + proc.Y > 0xFF:  # Page boundary crossed
+        proc.CYCLES += 1
     val = proc.mem_read((eff_addr + proc.Y) & 0xFFFF)
 
-    a_s = proc.signed_byte(proc.A)
-    v_s = proc.signed_byte(val)
-
-    carry = a_s >= v_s
-    zero = a_s == v_s
+    result = proc.A - val
 
-    proc.set_flags(
-        "C" if carry else "!C",
-        "Z" if zero else "!Z",
-        "N" if bool(proc.A & 0b10000000) else "!N"
-    )
+    proc.P_RAW = (proc.P_RAW & ~CARRY) | carry_flag(result >= 0)
+    proc.NZ_RESULT = result & 0xFF
 
 
 def execute_adm(adm: str, proc=None, operand: int = None) -> None:
@@ -178,16 +132,33 @@ def execute_opcode(proc, opcode: int, *args) -> None:
         zpiiy(proc, args[0])
 
 
+OPCODE_BYTES = {
+    ADM_IA:     2,
+    ADM_ZP:     2,
+    ADM_ZPIX:   2,
+    ADM_A:      3,
+    ADM_AIX:    3,
+    ADM_AIY:    3,
+    ADM_ZPII:   2,
+    ADM_ZPIIY:  2,
+}
+
+
 def get_opcode_bytes(opcode: int) -> int | None:
-    opcodes = {
-        ADM_IA:     2,
-        ADM_ZP:     2,
-        ADM_ZPIX:   2,
-        ADM_A:      3,
-        ADM_AIX:    3,
-        ADM_AIY:    3,
-        ADM_ZPII:   2,
-        ADM_ZPIIY:  2,
-    }
-
-    return opcodes.get(opcode)
+    return OPCODE_BYTES.get(opcode)
+
+
+OPCODE_CYCLES = {
+    ADM_IA:     2,
+    ADM_ZP:     3,
+    ADM_ZPIX:   4,
+    ADM_A:      4,
+    ADM_AIX:    4,
+    ADM_AIY:    4,
+    ADM_ZPII:   6,
+    ADM_ZPIIY:  5,
+}
+
+
+def get_opcode_cycles(opcode: int) -> int | None:
+    return OPCODE_CYCLES.get(opcode)
@@ -1,3 +1,5 @@
+from flags import CARRY, carry_flag
+
 INSTRUCTION = "CPX"
 
 ADM_IA      = 0xE0
@@ -6,49 +8,28 @@ ADM_A       = 0xEC
 
 
 def ia(proc, value: int) -> None:
-    x_s = proc.signed_byte(proc.X)
-    v_s = proc.signed_byte(value & 0xFF)
-
-    carry = x_s >= v_s
-    zero = x_s == v_s
+    result = proc.X - (value & 0xFF)
 
-    proc.set_flags(
-        "C" if carry else "!C",
-        "Z" if zero else "!Z",
-        "N" if bool(proc.X & 0b10000000) else "!N"
-    )
+    proc.P_RAW = (proc.P_RAW & ~CARRY) | carry_flag(result >= 0)
+    proc.NZ_RESULT = result & 0xFF
 
 
 def zp(proc, zp_addr: int) -> None:
     mem_val = proc.mem_read(zp_addr & 0xFF)
 
-    x_s = proc.signed_byte(proc.X)
-    v_s = proc.signed_byte(mem_val)
-
-    carry = x_s >= v_s
-    zero = x_s == v_s
+    result = proc.X - mem_val
 
-    proc.set_flags(
-        "C" if carry else "!C",
-        "Z" if zero else "!Z",
-        "N" if bool(proc.X & 0b10000000) else "!N"
-    )
+    proc.P_RAW = (proc.P_RAW & ~CARRY) | carry_flag(result >= 0)
+    proc.NZ_RESULT = result & 0xFF
 
 
 def a(proc, addr: int) -> None:
     val = proc.mem_read(addr & 0xFFFF)
 
-    x_s = proc.signed_byte(proc.X)
-    v_s = proc.signed_byte(val)
+    result = proc.X - val
 
-    carry = x_s >= v_s
-    zero = x_s == v_s
-
-    proc.set_flags(
-        "C" if carry else "!C",
-        "Z" if zero else "!Z",
-        "N" if bool(proc.X & 0b10000000) else "!N"
-    )
+    proc.P_RAW = (proc.P_RAW & ~CARRY) | carry_flag(result >= 0)
+    proc.NZ_RESULT = result & 0xFF
 
 
 def execute_adm(adm: str, proc=None, operand: int = None) -> None:
@@ -68,11 +49,20 @@ def execute_opcode(proc, opcode: int, *args) -> None:
     if opcode == ADM_A:
         a(proc, (args[1] << 8) + args[0])
 
+OPCODE_BYTES = {
+    ADM_IA:     2,
+    ADM_ZP:     2,
+    ADM_A:      3,
+}
+
 def get_opcode_bytes(opcode: int) -> int | None:
-    opcodes = {
-        ADM_IA:     2,
-        ADM_ZP:     2,
-        ADM_A:      3,
-    }
+    return OPCODE_BYTES.get(opcode)
+
+OPCODE_CYCLES = {
+    ADM_IA:     2,
+    ADM_ZP:     3,
+    ADM_A:      4,
+}
 
-    return opcodes.get(opcode)
\ No newline at end of file
+def get_opcode_cycles(opcode: int) -> int | None:
+    return OPCODE_CYCLES.get(opcode)
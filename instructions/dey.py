@@ -5,10 +5,7 @@ ADM_I = 0x88
 def i(proc) -> None:
     proc.Y = (proc.Y - 0x01) & 0xFF
 
-    proc.set_flags(
-        "Z" if not bool(proc.Y) else "!Z",
-        "N" if bool(proc.Y & 0b10000000) else "!N"
-    )
+    proc.NZ_RESULT = proc.Y
 
 def execute_adm(adm: str, proc = None, operand: int = None) -> None:
     if adm == "I":
@@ -17,9 +14,16 @@ def execute_adm(adm: str, proc = None, operand: int = None) -> None:
 def execute_opcode() -> None:
     pass
 
+OPCODE_BYTES = {
+    ADM_I: 1,
+}
+
 def get_opcode_bytes(opcode: int) -> int | None:
-    opcodes = {
-        ADM_I: 1,
-    }
+    return OPCODE_BYTES.get(opcode)
+
+OPCODE_CYCLES = {
+    ADM_I: 2,
+}
 
-    return opcodes.get(opcode)
+def get_opcode_cycles(opcode: int) -> int | None:
+    return OPCODE_CYCLES.get(opcode)
@@ -10,37 +10,25 @@ def zp(proc, zp_addr: int) -> None:
     zp_addr = zp_addr & 0xFF
     proc.mem_write(zp_addr, proc.mem_read(zp_addr) + 1)
 
-    proc.set_flags(
-        "Z" if not bool(proc.mem_read(zp_addr)) else "!Z",
-        "N" if bool(proc.mem_read(zp_addr) & 0b10000000) else "!N"
-    )
+    proc.NZ_RESULT = proc.mem_read(zp_addr)
 
 def zpix(proc, zp_addr: int) -> None:
     eff_addr = (zp_addr + proc.X) & 0xFF
     proc.mem_write(eff_addr, proc.mem_read(eff_addr) + 1)
 
-    proc.set_flags(
-        "Z" if not bool(proc.mem_read(eff_addr)) else "!Z",
-        "N" if bool(proc.mem_read(eff_addr) & 0b10000000) else "!N"
-    )
+    proc.NZ_RESULT = proc.mem_read(eff_addr)
 
 def a(proc, addr: int) -> None:
     addr = addr & 0xFFFF
     proc.mem_write(addr, proc.mem_read(addr) + 1)
 
-    proc.set_flags(
-        "Z" if not bool(proc.mem_read(addr)) else "!Z",
-        "N" if bool(proc.mem_read(addr) & 0b10000000) else "!N"
-    )
+    proc.NZ_RESULT = proc.mem_read(addr)
 
 def aix(proc, addr: int) -> None:
     eff_addr = (addr + proc.X) & 0xFFFF
     proc.mem_write(eff_addr, proc.mem_read(eff_addr) + 1)
 
-    proc.set_flags(
-        "Z" if not bool(proc.mem_read(eff_addr)) else "!Z",
-        "N" if bool(proc.mem_read(eff_addr) & 0b10000000) else "!N"
-    )
+    proc.NZ_RESULT = proc.mem_read(eff_addr)
 
 
 def execute_adm(adm: str, proc = None, operand: int = None) -> None:
@@ -63,12 +51,22 @@ def execute_opcode(proc, opcode: int, *args) -> None:
     if opcode == ADM_AIX:
         aix(proc, (args[1] << 8) + args[0])
 
+OPCODE_BYTES = {
+    ADM_ZP:     2,
+    ADM_ZPIX:   2,
+    ADM_A:      3,
+    ADM_AIX:    3,
+}
+
 def get_opcode_bytes(opcode: int) -> int | None:
-    opcodes = {
-        ADM_ZP:     2,
-        ADM_ZPIX:   2,
-        ADM_A:      3,
-        ADM_AIX:    3,
-    }
-
-    return opcodes.get(opcode)
+    return OPCODE_BYTES.get(opcode)
+
+OPCODE_CYCLES = {
+    ADM_ZP:     5,
+    ADM_ZPIX:   6,
+    ADM_A:      6,
+    ADM_AIX:    7,
+}
+
+def get_opcode_cycles(opcode: int) -> int | None:
+    return OPCODE_CYCLES.get(opcode)
@@ -13,80 +13,64 @@ ADM_ZPIIY   = 0xB1
 def ia(proc, value: int) -> None:
     proc.A = value & 0xFF
 
-    proc.set_flags(
-        "Z" if not bool(proc.A) else "!Z",
-        "N" if bool(proc.A & 0b10000000) else "!N"
-    )
+    proc.NZ_RESULT = proc.A
 
 
 def zp(proc, zp_addr: int) -> None:
-    proc.A = proc.MEMORY[zp_addr & 0xFF]
+    proc.A = proc.mem_read(zp_addr & 0xFF)
 
-    proc.set_flags(
-        "Z" if not bool(proc.A) else "!Z",
-        "N" if bool(proc.A & 0b10000000) else "!N"
-    )
+    proc.NZ_RESULT = proc.A
 
 
 def zpix(proc, zp_addr: int) -> None:
     eff_addr = (zp_addr + proc.X) & 0xFF
-    proc.A = proc.MEMORY[eff_addr]
+    proc.A = proc.mem_read(eff_addr)
 
-    proc.set_flags(
-        "Z" if not bool(proc.A) else "!Z",
-        "N" if bool(proc.A & 0b10000000) else "!N"
-    )
+    proc.NZ_RESULT = proc.A
 
 
 def a(proc, addr: int) -> None:
-    proc.A = proc.MEMORY[addr & 0xFFFF]
+    proc.A = proc.mem_read(addr & 0xFFFF)
 
-    proc.set_flags(
-        "Z" if not bool(proc.A) else "!Z",
-        "N" if bool(proc.A & 0b10000000) else "!N"
-    )
+    proc.NZ_RESULT = proc.A
 
 
 def aix(proc, addr: int) -> None:
+    if (addr & 0xFF) + proc.X > 0xFF:  # Page boundary crossed
+        proc.CYCLES += 1
+
     eff_addr = (addr + proc.X) & 0xFFFF
-    proc.A = proc.MEMORY[eff_addr]
+    proc.A = proc.mem_read(eff_addr)
 
-    proc.set_flags(
-        "Z" if not bool(proc.A) else "!Z",
-        "N" if bool(proc.A & 0b10000000) else "!N"
-    )
+    proc.NZ_RESULT = proc.A
 
 
 def aiy(proc, addr: int) -> None:
+    if (addr & 0xFF) + proc.Y > 0xFF:  # Page boundary crossed
+        proc.CYCLES += 1
+
     eff_addr = (addr + proc.Y) & 0xFFFF
-    proc.A = proc.MEMORY[eff_addr]
+    proc.A = proc.mem_read(eff_addr)
 
-    proc.set_flags(
-        "Z" if not bool(proc.A) else "!Z",
-        "N" if bool(proc.A & 0b10000000) else "!N"
-    )
+    proc.NZ_RESULT = proc.A
 
 
 def zpii(proc, zp_addr: int) -> None:
     ind_addr = (zp_addr + proc.X) & 0xFF
     eff_addr = ((proc.MEMORY[ind_addr + 1] << 8) + proc.MEMORY[ind_addr])
-    proc.A = proc.MEMORY[eff_addr & 0xFFFF]
+    proc.A = proc.mem_read(eff_addr & 0xFFFF)
 
-    proc.set_flags(
-        "Z" if not bool(proc.A) else "!Z",
-        "N" if bool(proc.A & 0b10000000) else "!N"
-    )
+    proc.NZ_RESULT = proc.A
 
 
 def zpiiy(proc, zp_addr: int) -> None:
     ind_addr = zp_addr & 0xFF
     eff_addr = ((proc.MEMORY[ind_addr + 1] << 8) + proc.MEMORY[ind_addr])
-    proc.A = proc.MEMORY[(eff_addr + proc.Y) & 0xFFFF]
+    if (eff_addr & 0xFF) + proc.Y > 0xFF:  # Page boundary crossed
+        proc.CYCLES += 1
+    proc.A = proc.mem_read((eff_addr + proc.Y) & 0xFFFF)
 
-    proc.set_flags(
-        "Z" if not bool(proc.A) else "!Z",
-        "N" if bool(proc.A & 0b10000000) else "!N"
-    )
+    proc.NZ_RESULT = proc.A
 
 
 def execute_adm(adm: str, proc = None, operand: int = None) -> None:
@@ -127,16 +111,33 @@ def execute_opcode(proc, opcode: int, *args) -> None:
         zpiiy(proc, args[0])
 
 
+OPCODE_BYTES = {
+    ADM_IA:     2,
+    ADM_ZP:     2,
+    ADM_ZPIX:   2,
+    ADM_A:      3,
+    ADM_AIX:    3,
+    ADM_AIY:    3,
+    ADM_ZPII:   2,
+    ADM_ZPIIY:  2,
+}
+
+
 def get_opcode_bytes(opcode: int) -> int | None:
-    opcodes = {
-        ADM_IA:     2,
-        ADM_ZP:     2,
-        ADM_ZPIX:   2,
-        ADM_A:      3,
-        ADM_AIX:    3,
-        ADM_AIY:    3,
-        ADM_ZPII:   2,
-        ADM_ZPIIY:  2,
-    }
-
-    return opcodes.get(opcode)
+    return OPCODE_BYTES.get(opcode)
+
+
+OPCODE_CYCLES = {
+    ADM_IA:     2,
+    ADM_ZP:     3,
+    ADM_ZPIX:   4,
+    ADM_A:      4,
+    ADM_AIX:    4,
+    ADM_AIY:    4,
+    ADM_ZPII:   6,
+    ADM_ZPIIY:  5,
+}
+
+
+def get_opcode_cycles(opcode: int) -> int | None:
+    return OPCODE_CYCLES.get(opcode)
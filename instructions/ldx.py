@@ -10,44 +10,32 @@ ADM_AIY     = 0xBE
 def ia(proc, value: int) -> None:
     proc.X = value & 0xFF
 
-    proc.set_flags(
-        "Z" if not bool(proc.X) else "!Z",
-        "N" if bool(proc.X & 0b10000000) else "!N"
-    )
+    proc.NZ_RESULT = proc.X
 
 def zp(proc, zp_addr: int) -> None:
-    proc.X = proc.MEMORY[zp_addr & 0xFF]
+    proc.X = proc.mem_read(zp_addr & 0xFF)
 
-    proc.set_flags(
-        "Z" if not bool(proc.X) else "!Z",
-        "N" if bool(proc.X & 0b10000000) else "!N"
-    )
+    proc.NZ_RESULT = proc.X
 
 def zpiy(proc, zp_addr: int) -> None:
     eff_addr = (zp_addr + proc.Y) & 0xFF
-    proc.X = proc.MEMORY[eff_addr]
+    proc.X = proc.mem_read(eff_addr)
 
-    proc.set_flags(
-        "Z" if not bool(proc.X) else "!Z",
-        "N" if bool(proc.X & 0b10000000) else "!N"
-    )
+    proc.NZ_RESULT = proc.X
 
 def a(proc, addr: int) -> None:
-    proc.X = proc.MEMORY[addr & 0xFFFF]
+    proc.X = proc.mem_read(addr & 0xFFFF)
 
-    proc.set_flags(
-        "Z" if not bool(proc.X) else "!Z",
-        "N" if bool(proc.X & 0b10000000) else "!N"
-    )
+    proc.NZ_RESULT = proc.X
 
 def aiy(proc, addr: int) -> None:
+    if (addr & 0xFF) + proc.Y > 0xFF:  # Page boundary crossed
+        proc.CYCLES += 1
+
     eff_addr = (addr + proc.Y) & 0xFFFF
-    proc.X = proc.MEMORY[eff_addr]
+    proc.X = proc.mem_read(eff_addr)
 
-    proc.set_flags(
-        "Z" if not bool(proc.X) else "!Z",
-        "N" if bool(proc.X & 0b10000000) else "!N"
-    )
+    proc.NZ_RESULT = proc.X
 
 
 def execute_adm(adm: str, proc = None, operand: int = None) -> None:
@@ -74,13 +62,24 @@ def execute_opcode(proc, opcode: int, *args) -> None:
     if opcode == ADM_AIY:
         aiy(proc, (args[1] << 8) + args[0])
 
+OPCODE_BYTES = {
+    ADM_IA:     2,
+    ADM_ZP:     2,
+    ADM_ZPIY:   2,
+    ADM_A:      3,
+    ADM_AIY:    3,
+}
+
 def get_opcode_bytes(opcode: int) -> int | None:
-    opcodes = {
-        ADM_IA:     2,
-        ADM_ZP:     2,
-        ADM_ZPIY:   2,
-        ADM_A:      3,
-        ADM_AIY:    3,
-    }
-
-    return opcodes.get(opcode)
+    return OPCODE_BYTES.get(opcode)
+
+OPCODE_CYCLES = {
+    ADM_IA:     2,
+    ADM_ZP:     3,
+    ADM_ZPIY:   4,
+    ADM_A:      4,
+    ADM_AIY:    4,
+}
+
+def get_opcode_cycles(opcode: int) -> int | None:
+    return OPCODE_CYCLES.get(opcode)
@@ -10,44 +10,32 @@ ADM_AIX     = 0xBC
 def ia(proc, value: int) -> None:
     proc.Y = value & 0xFF
 
-    proc.set_flags(
-        "Z" if not bool(proc.Y) else "!Z",
-        "N" if bool(proc.Y & 0b10000000) else "!N"
-    )
+    proc.NZ_RESULT = proc.Y
 
 def zp(proc, zp_addr: int) -> None:
-    proc.Y = proc.MEMORY[zp_addr & 0xFF]
+    proc.Y = proc.mem_read(zp_addr & 0xFF)
 
-    proc.set_flags(
-        "Z" if not bool(proc.Y) else "!Z",
-        "N" if bool(proc.Y & 0b10000000) else "!N"
-    )
+    proc.NZ_RESULT = proc.Y
 
 def zpix(proc, zp_addr: int) -> None:
     eff_addr = (zp_addr + proc.X) & 0xFF
-    proc.Y = proc.MEMORY[eff_addr]
+    proc.Y = proc.mem_read(eff_addr)
 
-    proc.set_flags(
-        "Z" if not bool(proc.Y) else "!Z",
-        "N" if bool(proc.Y & 0b10000000) else "!N"
-    )
+    proc.NZ_RESULT = proc.Y
 
 def a(proc, addr: int) -> None:
-    proc.Y = proc.MEMORY[addr & 0xFFFF]
+    proc.Y = proc.mem_read(addr & 0xFFFF)
 
-    proc.set_flags(
-        "Z" if not bool(proc.Y) else "!Z",
-        "N" if bool(proc.Y & 0b10000000) else "!N"
-    )
+    proc.NZ_RESULT = proc.Y
 
 def aix(proc, addr: int) -> None:
+    if (addr & 0xFF) + proc.X > 0xFF:  # Page boundary crossed
+        proc.CYCLES += 1
+
     eff_addr = (addr + proc.X) & 0xFFFF
-    proc.Y = proc.MEMORY[eff_addr]
+    proc.Y = proc.mem_read(eff_addr)
 
-    proc.set_flags(
-        "Z" if not bool(proc.Y) else "!Z",
-        "N" if bool(proc.Y & 0b10000000) else "!N"
-    )
+    proc.NZ_RESULT = proc.Y
 
 
 def execute_adm(adm: str, proc = None, operand: int = None) -> None:
@@ -74,13 +62,24 @@ def execute_opcode(proc, opcode: int, *args) -> None:
     if opcode == ADM_AIX:
         aix(proc, (args[1] << 8) + args[0])
 
+OPCODE_BYTES = {
+    ADM_IA:     2,
+    ADM_ZP:     2,
+    ADM_ZPIX:   2,
+    ADM_A:      3,
+    ADM_AIX:    3,
+}
+
 def get_opcode_bytes(opcode: int) -> int | None:
-    opcodes = {
-        ADM_IA:     2,
-        ADM_ZP:     2,
-        ADM_ZPIX:   2,
-        ADM_A:      3,
-        ADM_AIX:    3,
-    }
-
-    return opcodes.get(opcode)
+    return OPCODE_BYTES.get(opcode)
+
+OPCODE_CYCLES = {
+    ADM_IA:     2,
+    ADM_ZP:     3,
+    ADM_ZPIX:   4,
+    ADM_A:      4,
+    ADM_AIX:    4,
+}
+
+def get_opcode_cycles(opcode: int) -> int | None:
+    return OPCODE_CYCLES.get(opcode)
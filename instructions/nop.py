@@ -1,30 +1,48 @@
 INSTRUCTION = "NOP"
 
-ADM_I = (0x02, 0x03, 0x0B, 0x13, 0x1B,
+# $EA first, the rest are the undefined 65C02 opcodes, which execute as NOPs
+ADM_I = (0xEA,
+         0x02, 0x03, 0x0B, 0x13, 0x1B,
          0x22, 0x23, 0x2B, 0x33, 0x3B,
          0x42, 0x43, 0x44, 0x4B, 0x53,
-         0x5B, 0x5C, 0x62, 0x63, 0x6B,
-         0x73, 0x7B, 0x82, 0x83, 0x8B,
-         0x93, 0x9B, 0xA3, 0xAB, 0xB3,
-         0xBB, 0xC2, 0xC3, 0xCB, 0xD3,
-         0xD4, 0xDB, 0xDC, 0xE2, 0xE3,
-         0xEB, 0xF3, 0xF4, 0xFB, 0xFC)
-
-def i() -> None:
+         0x54, 0x5B, 0x5C, 0x62, 0x63,
+         0x6B, 0x73, 0x7B, 0x82, 0x83,
+         0x8B, 0x93, 0x9B, 0xA3, 0xAB,
+         0xB3, 0xBB, 0xC2, 0xC3, 0xD3,
+         0xD4, 0xDC, 0xE2, 0xE3, 0xEB,
+         0xF3, 0xF4, 0xFB, 0xFC)
+
+def i(proc=None, operand: int = None) -> None:
     pass
 
 def execute_adm(adm: str, proc = None, operand: int = None) -> None:
     if adm == "I":
-        i()
+        i(proc)
 
 def execute_opcode() -> None:
     pass
 
+# Undefined opcodes still fetch the operand bytes of the instruction group they decode as
+OPCODE_BYTES = {
+    0x02: 2, 0x22: 2, 0x42: 2, 0x62: 2, 0x82: 2, 0xC2: 2, 0xE2: 2,
+    0x44: 2, 0x54: 2, 0xD4: 2, 0xF4: 2,
+    0x5C: 3, 0xDC: 3, 0xFC: 3,
+}
+
 def get_opcode_bytes(opcode: int) -> int | None:
-    opcodes = {
-        ADM_I: 1,
-    }
+    if opcode in ADM_I:
+        return OPCODE_BYTES.get(opcode, 1)
+    return None
+
+OPCODE_CYCLES = {
+    0xEA: 2,
+    0x02: 2, 0x22: 2, 0x42: 2, 0x62: 2, 0x82: 2, 0xC2: 2, 0xE2: 2,
+    0x44: 3,
+    0x54: 4, 0xD4: 4, 0xF4: 4, 0xDC: 4, 0xFC: 4,
+    0x5C: 8,
+}
 
+def get_opcode_cycles(opcode: int) -> int | None:
     if opcode in ADM_I:
-        return opcodes[ADM_I]
+        return OPCODE_CYCLES.get(opcode, 1)
     return None
@@ -1,3 +1,5 @@
+from flags import CARRY, carry_flag
+
 INSTRUCTION = "ROL"
 
 ADM_AA      = 0x2A
@@ -10,13 +12,10 @@ ADM_AIX     = 0x3E
 def aa(proc) -> None:
     carry = (proc.A >> 7) & 1
     proc.A = (proc.A << 1) & 0xFF
-    proc.A |= proc.P & 0b00000001
+    proc.A |= proc.P_RAW & 0b00000001
 
-    proc.set_flags(
-        "C" if carry else "!C",
-        "Z" if not bool(proc.A) else "!Z",
-        "N" if bool(proc.A & 0b10000000) else "!N"
-    )
+    proc.P_RAW = (proc.P_RAW & ~CARRY) | carry_flag(carry)
+    proc.NZ_RESULT = proc.A
 
 
 def zp(proc, zp_addr: int) -> None:
@@ -24,15 +23,12 @@ def zp(proc, zp_addr: int) -> None:
 
     carry = (mem_val >> 7) & 1
     mem_val = (mem_val << 1) & 0xFF
-    mem_val |= proc.P & 0b00000001
+    mem_val |= proc.P_RAW & 0b00000001
 
     proc.mem_write(zp_addr & 0xFF, mem_val)
 
-    proc.set_flags(
-        "C" if carry else "!C",
-        "Z" if not bool(mem_val) else "!Z",
-        "N" if bool(mem_val & 0b10000000) else "!N"
-    )
+    proc.P_RAW = (proc.P_RAW & ~CARRY) | carry_flag(carry)
+    proc.NZ_RESULT = mem_val
 
 
 def zpix(proc, zp_addr: int) -> None:
@@ -40,15 +36,12 @@ def zpix(proc, zp_addr: int) -> None:
 
     carry = (mem_val >> 7) & 1
     mem_val = (mem_val << 1) & 0xFF
-    mem_val |= proc.P & 0b00000001
+    mem_val |= proc.P_RAW & 0b00000001
 
     proc.mem_write((zp_addr + proc.X) & 0xFF, mem_val)
 
-    proc.set_flags(
-        "C" if carry else "!C",
-        "Z" if not bool(mem_val) else "!Z",
-        "N" if bool(mem_val & 0b10000000) else "!N"
-    )
+    proc.P_RAW = (proc.P_RAW & ~CARRY) | carry_flag(carry)
+    proc.NZ_RESULT = mem_val
 
 
 def a(proc, addr: int) -> None:
@@ -56,31 +49,28 @@ def a(proc, addr: int) -> None:
 
     carry = (mem_val >> 7) & 1
     mem_val = (mem_val << 1) & 0xFF
-    mem_val |= proc.P & 0b00000001
+    mem_val |= proc.P_RAW & 0b00000001
 
     proc.mem_write(addr & 0xFFFF, mem_val)
 
-    proc.set_flags(
-        "C" if carry else "!C",
-        "Z" if not bool(mem_val) else "!Z",
-        "N" if bool(mem_val & 0b10000000) else "!N"
-    )
+    proc.P_RAW = (proc.P_RAW & ~CARRY) | carry_flag(carry)
+    proc.NZ_RESULT = mem_val
 
 
 def aix(proc, addr: int) -> None:
+    if (addr & 0xFF) + proc.X > 0xFF:  # Page boundary crossed
+        proc.CYCLES += 1
+
     mem_val = proc.mem_read((addr + proc.X) & 0xFFFF)
 
     carry = (mem_val >> 7) & 1
     mem_val = (mem_val << 1) & 0xFF
-    mem_val |= proc.P & 0b00000001
+    mem_val |= proc.P_RAW & 0b00000001
 
     proc.mem_write((addr + proc.X) & 0xFFFF, mem_val)
 
-    proc.set_flags(
-        "C" if carry else "!C",
-        "Z" if not bool(mem_val) else "!Z",
-        "N" if bool(mem_val & 0b10000000) else "!N"
-    )
+    proc.P_RAW = (proc.P_RAW & ~CARRY) | carry_flag(carry)
+    proc.NZ_RESULT = mem_val
 
 
 def execute_adm(adm: str, proc=None, operand: int = None) -> None:
@@ -109,13 +99,27 @@ def execute_opcode(proc, opcode: int, *args) -> None:
         aix(proc, (args[1] << 8) + args[0])
 
 
+OPCODE_BYTES = {
+    ADM_AA:     1,
+    ADM_ZP:     2,
+    ADM_ZPIX:   2,
+    ADM_A:      3,
+    ADM_AIX:    3,
+}
+
+
 def get_opcode_bytes(opcode: int) -> int | None:
-    opcodes = {
-        ADM_AA:     1,
-        ADM_ZP:     2,
-        ADM_ZPIX:   2,
-        ADM_A:      3,
-        ADM_AIX:    3,
-    }
-
-    return opcodes.get(opcode)
+    return OPCODE_BYTES.get(opcode)
+
+
+OPCODE_CYCLES = {
+    ADM_AA:     2,
+    ADM_ZP:     5,
+    ADM_ZPIX:   6,
+    ADM_A:      6,
+    ADM_AIX:    6,
+}
+
+
+def get_opcode_cycles(opcode: int) -> int | None:
+    return OPCODE_CYCLES.get(opcode)
@@ -31,12 +31,22 @@ def execute_opcode(proc, opcode: int, *args) -> None:
     if opcode == ADM_A:
         a(proc, (args[1] << 8) + args[0])
 
+OPCODE_BYTES = {
+    ADM_ZP:     2,
+    ADM_ZPIX:   2,
+    ADM_A:      3,
+}
+
 def get_opcode_bytes(opcode: int) -> int | None:
-    opcodes = {
-        ADM_ZP:     2,
-        ADM_ZPIX:   2,
-        ADM_A:      3,
-    }
+    return OPCODE_BYTES.get(opcode)
+
+
+OPCODE_CYCLES = {
+    ADM_ZP:     3,
+    ADM_ZPIX:   4,
+    ADM_A:      4,
+}
 
-    return opcodes.get(opcode)
 
+def get_opcode_cycles(opcode: int) -> int | None:
+    return OPCODE_CYCLES.get(opcode)
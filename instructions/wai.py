@@ -0,0 +1,28 @@
+INSTRUCTION = "WAI"
+
+ADM_I = 0xCB
+
+def i(proc) -> None:
+    proc.WAITING = True  # Sleep until an interrupt, see W65C02S.service_events
+    proc.NEXT_EVENT = proc.CYCLES
+
+def execute_adm(adm: str, proc = None, operand: int = None) -> None:
+    if adm == "I":
+        i(proc)
+
+def execute_opcode() -> None:
+    pass
+
+OPCODE_BYTES = {
+    ADM_I: 1,
+}
+
+def get_opcode_bytes(opcode: int) -> int | None:
+    return OPCODE_BYTES.get(opcode)
+
+OPCODE_CYCLES = {
+    ADM_I: 3,
+}
+
+def get_opcode_cycles(opcode: int) -> int | None:
+    return OPCODE_CYCLES.get(opcode)
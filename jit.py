@@ -0,0 +1,337 @@
+import re
+
+import alu
+from blocks import MAX_BLOCK_CYCLES, BlockCache
+from bus import NUM_PAGES
+from flags import NZ_FLAGS
+from opcodes import (COMPARES, FLAG_OPS, LOADS, LOGIC, MNEMONICS, MODES, PAGE_PENALTY, SHIFTS, STEPS, STORES,
+                     TRANSFERS)
+
+JIT_THRESHOLD = 16  # Number of block executions before it gets compiled
+
+REGISTERS = ("A", "X", "Y", "S", "P")
+SLOTS = {"A": "A", "X": "X", "Y": "Y", "S": "S", "P": "P_RAW"}  # Compiled blocks carry N and Z lazily in nz
+
+
+def _address(mnemonic: str, mode: str, operand: int) -> tuple[list, str]:
+    penalty = mnemonic in PAGE_PENALTY
+
+    if mode == "ZP":
+        return [], f"0x{operand & 0xFF:02X}"
+    if mode == "ZPIX":
+        return [], f"(X + 0x{operand:02X}) & 0xFF"
+    if mode == "ZPIY":
+        return [], f"(Y + 0x{operand:02X}) & 0xFF"
+    if mode == "A":
+        return [], f"0x{operand & 0xFFFF:04X}"
+    if mode in ("AIX", "AIY"):
+        reg = mode[-1]
+        lines = [f"if {reg} > 0x{0xFF - (operand & 0xFF):02X}: cyc += 1"] if penalty else []
+        return lines, f"({reg} + 0x{operand:04X}) & 0xFFFF"
+    if mode == "ZPII":
+        return [f"ptr = (X + 0x{operand:02X}) & 0xFF"], "(mem[ptr + 1] << 8) + mem[ptr]"
+    if mode == "ZPIIY":
+        zp_addr = operand & 0xFF
+        lines = [f"ind = (mem[0x{zp_addr + 1:02X}] << 8) + mem[0x{zp_addr:02X}]"]
+        if penalty:
+            lines.append("if (ind & 0xFF) + Y > 0xFF: cyc += 1")
+        return lines, "(ind + Y) & 0xFFFF"
+
+    raise ValueError(mode)
+
+
+def _write(addr: str, val: str) -> list:
+    # Inlined mem_write fast path, the page of a constant address is folded at compile time
+    if re.fullmatch(r"0x[0-9A-F]+", addr):
+        page = f"0x{int(addr, 16) >> 8:02X}"
+        return [f"if traps[{page}]: write({addr}, {val})", f"else: mem[{addr}] = {val}"]
+
+    lines = [] if addr == "addr" else [f"addr = {addr}"]
+    return lines + [f"if traps[addr >> 8]: write(addr, {val})", f"else: mem[addr] = {val}"]
+
+
+def _read(mnemonic: str, mode: str, operand: int, load: str) -> list:
+    if mode == "IA":
+        return [f"v = 0x{operand & 0xFF:02X}"]
+
+    lines, addr = _address(mnemonic, mode, operand)
+    return lines + [f"v = {load.format(addr)}"]
+
+
+def _instruction(mnemonic: str, mode: str, operand: int, load: str) -> tuple[list, bool] | None:
+    # Returns the source lines of one instruction and whether it writes memory,
+    # load is the format of a data read, either direct MEMORY indexing or a mem_read call
+    if mnemonic == "NOP":
+        return [], False
+
+    if mnemonic in FLAG_OPS:
+        flag, val = FLAG_OPS[mnemonic]
+        return [f"P |= 0x{flag:02X}" if val else f"P &= 0x{~flag & 0xFF:02X}"], False
+
+    if mnemonic in LOADS:
+        reg = LOADS[mnemonic]
+        return _read(mnemonic, mode, operand, load) + [f"{reg} = nz = v"], False
+
+    if mnemonic in STORES:
+        lines, addr = _address(mnemonic, mode, operand)
+        return lines + _write(addr, STORES[mnemonic]), True
+
+    if mnemonic in TRANSFERS:
+        src, dst = TRANSFERS[mnemonic]
+        return [f"{dst} = nz = {src}"], False
+
+    if mnemonic == "TXS":
+        return ["S = X"], False
+
+    if mnemonic in STEPS:
+        reg, step = STEPS[mnemonic]
+        return [f"{reg} = nz = ({reg} {'+' if step > 0 else '-'} 1) & 0xFF"], False
+
+    if mnemonic in LOGIC:
+        return _read(mnemonic, mode, operand, load) + [f"A = nz = A {LOGIC[mnemonic]} v"], False
+
+    if mnemonic in ("ADC", "SBC"):
+        return _read(mnemonic, mode, operand, load) + [
+            "if P & 0x08: cyc += 1",
+            f"r = {mnemonic}_TABLE[(P & 0x01 | (P & 0x08) >> 2) << 16 | A << 8 | v]",
+            "A = r & 0xFF",
+            "P = (P & 0x3C) | (r >> 8)",
+            "nz = None",
+        ], False
+
+    if mnemonic in COMPARES:
+        reg = COMPARES[mnemonic]
+        return _read(mnemonic, mode, operand, load) + [
+            f"r = {reg} - v",
+            "P = (P & 0xFE) | (r >= 0)",
+            "nz = r & 0xFF",
+        ], False
+
+    if mnemonic in ("INC", "DEC"):
+        lines, addr = _address(mnemonic, mode, operand)
+        op = "+" if mnemonic == "INC" else "-"
+        return lines + [
+            f"addr = {addr}",
+            f"v = ({load.format('addr')} {op} 1) & 0xFF",
+            *_write("addr", "v"),
+            "nz = v",
+        ], True
+
+    if mnemonic in SHIFTS:
+        left, rotate = SHIFTS[mnemonic]
+        carry = "c = v >> 7" if left else "c = v & 0x01"
+        shift = "v = ((v << 1) & 0xFF)" if left else "v = v >> 1"
+        if rotate:
+            shift += " | (P & 0x01)" if left else " | ((P & 0x01) << 7)"
+        if mode == "AA":
+            return ["v = A", carry, shift, "A = nz = v", "P = (P & 0xFE) | c"], False
+
+        lines, addr = _address(mnemonic, mode, operand)
+        return lines + [
+            f"addr = {addr}",
+            f"v = {load.format('addr')}",
+            carry, shift,
+            *_write("addr", "v"),
+            "P = (P & 0xFE) | c",
+            "nz = v",
+        ], True
+
+    if mnemonic in ("WAI", "STP"):  # Always the last instruction of a block
+        state = "WAITING" if mnemonic == "WAI" else "STOPPED"
+        return [f"proc.{state} = True", "proc.NEXT_EVENT = 0"], False
+
+    if mnemonic == "PHA":
+        return _write("0x0100 | S", "A") + ["S = (S - 1) & 0xFF"], True
+    if mnemonic == "PHP":
+        return [
+            "if nz is not None: P, nz = (P & 0x7D) | NZF[nz], None",
+            *_write("0x0100 | S", "P"),
+            "S = (S - 1) & 0xFF",
+        ], True
+    if mnemonic == "PLA":
+        return ["S = (S + 1) & 0xFF", f"A = nz = {load.format('0x0100 | S')}"], False
+    if mnemonic == "PLP":
+        return ["S = (S + 1) & 0xFF", f"P = {load.format('0x0100 | S')}", "nz = None"], False
+
+    return None
+
+
+def _exit(pc: int, cycles: int) -> list:
+    return [f"proc.{SLOTS[reg]} = {reg}" for reg in REGISTERS] + [
+        "proc.NZ_RESULT = nz",
+        f"proc.PC = 0x{pc:04X}",
+        f"proc.CYCLES = start + {cycles} + cyc",
+        "return",
+    ]
+
+
+def generate_source(block: tuple, devices: bool = False) -> str | None:
+    load = "read({})" if devices else "mem[{}]"
+    body = []
+    cycles = 0
+
+    for handler, operand, next_pc, base_cycles, opcode in block:
+        mnemonic = MNEMONICS[opcode]
+        mode = MODES[opcode]
+        if mnemonic is None:  # Illegal opcode, raised by the interpreter
+            return None
+
+        instruction = _instruction(mnemonic, mode, operand, load)
+        if instruction is None:
+            return None
+
+        lines, writes = instruction
+        cycles += base_cycles
+
+        # Device and trap callbacks run mid-block and may schedule events, CYCLES has to be current for them
+        sync = f"proc.CYCLES = start + {cycles} + cyc"
+        reads = False
+        body.append(f"# {mnemonic} {mode}")
+        for line in lines:
+            if devices and "read(" in line:
+                body.append(sync)
+                reads = True
+            body.append(line.replace(": write(", f": {sync}; write("))
+
+        # Writes may modify code and device accesses may raise an interrupt, both end the block early
+        if writes or reads:
+            body.append("if cache.dirty:  # Leave the rest to the interpreter")
+            body.extend("    " + line for line in _exit(next_pc, cycles))
+
+    body.extend(_exit(block[-1][2], cycles)[:-1])
+
+    source = ["def compiled_block(proc):"]
+    source.append("    mem = proc.MEMORY")
+    source.append("    read = proc.mem_read")
+    source.append("    write = proc.mem_write")
+    source.append("    traps = proc.WRITE_TRAPS")
+    source.append("    cache = proc.BLOCK_CACHE")
+    source.extend(f"    {reg} = proc.{SLOTS[reg]}" for reg in REGISTERS)
+    source.append("    nz = proc.NZ_RESULT")
+    source.append("    start = proc.CYCLES")
+    source.append("    cyc = 0")
+    source.extend("    " + line for line in body)
+
+    return "\n".join(source) + "\n"
+
+
+def compile_block(block: tuple, devices: bool = False):
+    source = generate_source(block, devices)
+    if source is None:
+        return None
+
+    namespace = {"NZF": NZ_FLAGS}
+    for table in ("ADC_TABLE", "SBC_TABLE"):  # Only built once a block uses them, see alu.py
+        if table in source:
+            namespace[table] = getattr(alu, table)
+    exec(compile(source, "<jit>", "exec"), namespace)
+
+    return namespace["compiled_block"]
+
+
+class JitCache(BlockCache):
+    def __init__(self, proc, threshold: int = JIT_THRESHOLD, verify: bool = False) -> None:
+        super().__init__(proc)
+        self.threshold = threshold
+        self.verify = verify  # Check every compiled block against the interpreter
+        self.counts = {}  # Start PC -> number of executions
+        self.compiled = {}  # Start PC -> compiled function, or None when the block can't be compiled
+
+    def invalidate_page(self, page: int) -> None:
+        for start in self.page_blocks[page]:
+            self.counts.pop(start, None)
+            self.compiled.pop(start, None)
+
+        super().invalidate_page(page)
+
+    def fork(self, proc) -> "JitCache":
+        # Compiled blocks only touch the processor passed to them and can be shared
+        cache = super().fork(proc)
+        cache.counts = self.counts.copy()
+        cache.compiled = self.compiled.copy()
+        return cache
+
+    def _run_verified(self, start: int, block: tuple, function) -> None:
+        # Both runs being compared see the bus with every callback removed, so devices and ROM write
+        # protection don't see the block twice, the compiled block is then run once more for real
+        proc = self.proc
+        names = REGISTERS + ("PC", "CYCLES")
+        state = [getattr(proc, reg) for reg in names]
+        memory = bytes(proc.MEMORY)
+        traps = bytes(proc.WRITE_TRAPS)
+        readers, writers = proc.PAGE_READERS, proc.PAGE_WRITERS
+
+        def rewind() -> None:
+            for reg, val in zip(names, state):
+                setattr(proc, reg, val)
+            proc.MEMORY_VIEW[:] = memory
+            proc.WRITE_TRAPS[:] = traps  # Self-modifying writes must stop every run at the same point
+            self.dirty = False
+
+        proc.PAGE_READERS = proc.PAGE_WRITERS = [None] * NUM_PAGES
+        try:
+            self.dirty = False
+            self._interpret(block)
+            expected = [getattr(proc, reg) for reg in names], bytes(proc.MEMORY)
+
+            rewind()
+            function(proc)
+            actual = [getattr(proc, reg) for reg in names], bytes(proc.MEMORY)
+        finally:
+            proc.PAGE_READERS, proc.PAGE_WRITERS = readers, writers
+
+        if actual != expected:
+            raise RuntimeError(
+                f"JIT mismatch in block at {start:04X}: "
+                f"expected {expected[0]}, got {actual[0]}"
+                + ("" if actual[1] == expected[1] else ", memory differs")
+            )
+
+        if any(readers) or any(writers):
+            rewind()
+            function(proc)
+
+    def run(self, cycles: int) -> int:
+        proc = self.proc
+        blocks = self.blocks
+        compiled = self.compiled
+        counts = self.counts
+        start = proc.CYCLES
+        deadline = start + cycles
+
+        while proc.CYCLES < deadline:
+            if proc.CYCLES >= proc.NEXT_EVENT and not proc.service_events(deadline):
+                break
+
+            pc = proc.PC
+
+            if pc in self.polls and pc in blocks:
+                self.dirty = False
+                self._run_poll(blocks[pc], deadline)
+                continue
+
+            # Compiled blocks can't stop halfway, blocks an event may interrupt are interpreted
+            function = compiled.get(pc)
+            if function is not None and proc.NEXT_EVENT - proc.CYCLES >= MAX_BLOCK_CYCLES:
+                if self.verify:
+                    self._run_verified(pc, blocks[pc], function)
+                else:
+                    self.dirty = False
+                    function(proc)
+                continue
+
+            block = blocks.get(pc)
+            if block is None:
+                block = self.translate(pc)
+                if block is None:
+                    break
+
+            if pc not in compiled:
+                counts[pc] = counts.get(pc, 0) + 1
+                if counts[pc] >= self.threshold:
+                    compiled[pc] = compile_block(block, proc.DEVICE_PAGES > 0)
+
+            self.dirty = False
+            self._interpret(block)
+
+        return proc.CYCLES - start
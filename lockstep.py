@@ -0,0 +1,288 @@
+import numpy as np
+
+import alu
+from flags import NZ_FLAGS
+from opcodes import (COMPARES, DISPATCH, FLAG_OPS, LOADS, LOGIC, MNEMONICS, PAGE_PENALTY, SHIFTS, STEPS,
+                     STORES, TRANSFERS)
+from w65c02s import W65C02S
+
+NZF = np.array(NZ_FLAGS, dtype=np.uint8)
+ADC = np.frombuffer(alu.ADC_TABLE, dtype=np.uint16)
+SBC = np.frombuffer(alu.SBC_TABLE, dtype=np.uint16)
+NUM_BYTES = np.array([entry[1] for entry in DISPATCH], dtype=np.intp)
+
+# NumPy counterparts of the LOGIC operators
+UFUNCS = {"&": np.bitwise_and, "|": np.bitwise_or, "^": np.bitwise_xor}
+
+REGISTERS = ("A", "X", "Y", "S", "P")
+
+
+def _address(eng, lanes, mnemonic: str, mode: str, operand: int):
+    # Returns a constant address or an array of per-lane addresses
+    if mode == "ZP":
+        return operand & 0xFF
+    if mode == "A":
+        return operand & 0xFFFF
+
+    if mode in ("ZPIX", "ZPIY"):
+        reg = getattr(eng, mode[-1])[lanes].astype(np.intp)
+        return (reg + operand) & 0xFF
+    if mode in ("AIX", "AIY"):
+        reg = getattr(eng, mode[-1])[lanes].astype(np.intp)
+        if mnemonic in PAGE_PENALTY:
+            eng.CYCLES[lanes] += (operand & 0xFF) + reg > 0xFF  # Page boundary crossed
+        return (reg + operand) & 0xFFFF
+
+    mem = eng.MEMORY
+    if mode == "ZPII":
+        ptr = (eng.X[lanes].astype(np.intp) + operand) & 0xFF
+        return (mem[lanes, ptr + 1].astype(np.intp) << 8) + mem[lanes, ptr]
+    if mode == "ZPIIY":
+        ptr = operand & 0xFF
+        ind = (mem[lanes, ptr + 1].astype(np.intp) << 8) + mem[lanes, ptr]
+        reg = eng.Y[lanes].astype(np.intp)
+        if mnemonic in PAGE_PENALTY:
+            eng.CYCLES[lanes] += (ind & 0xFF) + reg > 0xFF  # Page boundary crossed
+        return (ind + reg) & 0xFFFF
+
+    raise ValueError(mode)
+
+
+def _read(eng, lanes, mnemonic: str, mode: str, operand: int):
+    if mode == "IA":
+        return np.full(len(lanes), operand & 0xFF, dtype=np.uint8)
+
+    return eng.MEMORY[lanes, _address(eng, lanes, mnemonic, mode, operand)]
+
+
+def _set_nz(eng, lanes, val, mask: int = 0x7D) -> None:
+    eng.P[lanes] = (eng.P[lanes] & mask) | NZF[val]
+
+
+def _kernel(mnemonic: str, mode: str):
+    # Returns a function executing one instruction on an array of lanes, or None for instructions
+    # that run through their instructions/*.py handler one lane at a time, kernels only exist for
+    # the register and ALU operations that dominate straight-line code
+    if mnemonic == "NOP":
+        return lambda eng, lanes, operand: None
+
+    if mnemonic in FLAG_OPS:
+        flag, bit = FLAG_OPS[mnemonic]
+        keep = ~flag & 0xFF
+
+        def flag_op(eng, lanes, operand):
+            eng.P[lanes] = (eng.P[lanes] & keep) | bit
+        return flag_op
+
+    if mnemonic in LOADS:
+        reg = LOADS[mnemonic]
+
+        def load(eng, lanes, operand):
+            val = _read(eng, lanes, mnemonic, mode, operand)
+            getattr(eng, reg)[lanes] = val
+            _set_nz(eng, lanes, val)
+        return load
+
+    if mnemonic in STORES:
+        reg = STORES[mnemonic]
+
+        def store(eng, lanes, operand):
+            eng.MEMORY[lanes, _address(eng, lanes, mnemonic, mode, operand)] = getattr(eng, reg)[lanes]
+        return store
+
+    if mnemonic in TRANSFERS:
+        src, dst = TRANSFERS[mnemonic]
+
+        def transfer(eng, lanes, operand):
+            val = getattr(eng, src)[lanes]
+            getattr(eng, dst)[lanes] = val
+            _set_nz(eng, lanes, val)
+        return transfer
+
+    if mnemonic in STEPS:
+        reg, step = STEPS[mnemonic]
+
+        def step_op(eng, lanes, operand):
+            val = ((getattr(eng, reg)[lanes].astype(np.intp) + step) & 0xFF).astype(np.uint8)
+            getattr(eng, reg)[lanes] = val
+            _set_nz(eng, lanes, val)
+        return step_op
+
+    if mnemonic in LOGIC:
+        op = UFUNCS[LOGIC[mnemonic]]
+
+        def logic(eng, lanes, operand):
+            val = op(eng.A[lanes], _read(eng, lanes, mnemonic, mode, operand))
+            eng.A[lanes] = val
+            _set_nz(eng, lanes, val)
+        return logic
+
+    if mnemonic in ("ADC", "SBC"):
+        table = ADC if mnemonic == "ADC" else SBC
+
+        def arithmetic(eng, lanes, operand):
+            val = _read(eng, lanes, mnemonic, mode, operand).astype(np.intp)
+            p = eng.P[lanes].astype(np.intp)
+            eng.CYCLES[lanes] += (p & 0x08) != 0  # Extra cycle in decimal mode
+
+            result = table[(p & 0x01 | (p & 0x08) >> 2) << 16 | eng.A[lanes].astype(np.intp) << 8 | val]
+            eng.A[lanes] = result & 0xFF
+            eng.P[lanes] = (p & 0x3C) | (result >> 8)
+        return arithmetic
+
+    if mnemonic in COMPARES:
+        reg = COMPARES[mnemonic]
+
+        def compare(eng, lanes, operand):
+            result = getattr(eng, reg)[lanes].astype(np.intp) - _read(eng, lanes, mnemonic, mode, operand)
+            eng.P[lanes] = (eng.P[lanes] & 0x7C) | NZF[result & 0xFF] | (result >= 0)
+        return compare
+
+    if mnemonic in SHIFTS and mode == "AA":
+        left, rotate = SHIFTS[mnemonic]
+
+        def shift(eng, lanes, operand):
+            val = eng.A[lanes]
+            carry_in = eng.P[lanes] & 0x01 if rotate else 0
+            if left:
+                carry = val >> 7
+                val = (val << 1) | carry_in
+            else:
+                carry = val & 0x01
+                val = (val >> 1) | (carry_in << 7)
+
+            eng.A[lanes] = val
+            _set_nz(eng, lanes, val, 0x7C)
+            eng.P[lanes] |= carry
+        return shift
+
+    return None
+
+
+def _build_kernels() -> tuple:
+    kernels = []
+    for opcode, (handler, num_bytes, decode, cycles) in enumerate(DISPATCH):
+        mnemonic = MNEMONICS[opcode]
+        kernels.append(None if mnemonic is None else _kernel(mnemonic, handler.__name__.upper()))
+
+    return tuple(kernels)
+
+
+# Vectorized counterpart of every DISPATCH entry, None where the scalar handler runs per lane
+KERNELS = _build_kernels()
+
+
+# N processors executed in lockstep, lanes that share a PC and instruction run as one NumPy operation
+class LockstepEngine:
+    def __init__(self, lanes: int) -> None:
+        self.LANES = lanes
+
+        self.A = np.zeros(lanes, dtype=np.uint8)
+        self.X = np.zeros(lanes, dtype=np.uint8)
+        self.Y = np.zeros(lanes, dtype=np.uint8)
+        self.S = np.full(lanes, 0xFD, dtype=np.uint8)
+        self.P = np.full(lanes, 0b00100100, dtype=np.uint8)
+        self.PC = np.zeros(lanes, dtype=np.uint16)
+        self.CYCLES = np.zeros(lanes, dtype=np.int64)
+        self.HALTED = np.zeros(lanes, dtype=bool)  # Set when a lane reaches a 0x00 opcode
+
+        self.MEMORY = np.zeros((lanes, 0x10000), dtype=np.uint8)  # 64 KB per lane, plain RAM
+
+        self._scalar = W65C02S()  # Runs the instructions/*.py handlers of opcodes without a kernel
+
+    def load_rom(self, rom: bytes, base: int = 0x8000) -> None:
+        if not 0 <= base <= 0x10000 - len(rom):
+            raise ValueError(f"ROM of {len(rom)} bytes does not fit in memory at {base:04X}")
+
+        self.MEMORY[:, base:base + len(rom)] = np.frombuffer(rom, dtype=np.uint8)
+
+    def reset(self) -> None:
+        self.S[:] = 0xFD
+        self.P[:] = 0b00100100
+        self.PC[:] = (self.MEMORY[:, 0xFFFD].astype(np.uint16) << 8) + self.MEMORY[:, 0xFFFC]
+        self.HALTED[:] = False
+
+    def lane(self, index: int) -> W65C02S:
+        # Copy of one lane as a regular processor, e.g. for w65c02s_interface
+        proc = W65C02S()
+        proc.MEMORY_VIEW[:] = self.MEMORY[index].tobytes()
+        for reg in REGISTERS + ("PC", "CYCLES"):
+            setattr(proc, reg, int(getattr(self, reg)[index]))
+        return proc
+
+    def _run_lane(self, index: int, opcode: int) -> None:
+        proc = self._scalar
+        proc.MEMORY = memoryview(self.MEMORY[index])
+        for reg in REGISTERS:
+            setattr(proc, reg, int(getattr(self, reg)[index]))
+        proc.PC = pc = int(self.PC[index])
+        proc.CYCLES = 0
+
+        handler, num_bytes, decode, cycles = DISPATCH[opcode]
+        if decode is None:
+            handler(proc)
+        else:
+            handler(proc, decode(proc.MEMORY, pc))
+
+        for reg in REGISTERS:
+            getattr(self, reg)[index] = getattr(proc, reg)
+        self.CYCLES[index] += proc.CYCLES
+
+        if proc.WAITING or proc.STOPPED:  # WAI/STP, lanes have no interrupt sources to wake them
+            self.HALTED[index] = True
+            proc.WAITING = proc.STOPPED = False
+
+    def step(self, active=None) -> int:
+        # Executes one instruction on every running lane, returns the number of lanes that ran
+        running = ~self.HALTED if active is None else active & ~self.HALTED
+        lanes = np.flatnonzero(running)
+        if not len(lanes):
+            return 0
+
+        mem = self.MEMORY
+        pc = self.PC[lanes].astype(np.intp)
+        opcode = mem[lanes, pc].astype(np.intp)
+
+        halted = opcode == 0x00
+        if halted.any():
+            self.HALTED[lanes[halted]] = True
+            lanes, pc, opcode = lanes[~halted], pc[~halted], opcode[~halted]
+            if not len(lanes):
+                return 0
+
+        num_bytes = NUM_BYTES[opcode]
+        operand = np.where(num_bytes > 1, mem[lanes, (pc + 1) & 0xFFFF], 0).astype(np.intp)
+        operand |= np.where(num_bytes > 2, mem[lanes, (pc + 2) & 0xFFFF], 0).astype(np.intp) << 8
+
+        key = pc << 32 | opcode << 16 | operand
+        if (key == key[0]).all():
+            firsts, groups = [0], [lanes]
+        else:  # Lanes diverged, run each distinct PC and instruction as its own group
+            keys, firsts, inverse = np.unique(key, return_index=True, return_inverse=True)
+            groups = [lanes[inverse == group] for group in range(len(keys))]
+
+        for first, members in zip(firsts, groups):
+            op = int(opcode[first])
+            handler, num_bytes, decode, cycles = DISPATCH[op]
+            self.CYCLES[members] += cycles
+
+            kernel = KERNELS[op]
+            if kernel is None or len(members) == 1:
+                for index in members:
+                    self._run_lane(index, op)
+            else:
+                kernel(self, members, int(operand[first]))
+
+            self.PC[members] = (int(pc[first]) + num_bytes) & 0xFFFF
+
+        return len(lanes)
+
+    def run_for_cycles(self, cycles: int) -> np.ndarray:
+        # Runs every lane for at least the given number of cycles, returns the cycles consumed per lane
+        start = self.CYCLES.copy()
+        deadline = start + cycles
+
+        while self.step(self.CYCLES < deadline):
+            pass
+
+        return self.CYCLES - start
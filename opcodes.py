@@ -0,0 +1,194 @@
+from collections import namedtuple
+from types import MappingProxyType
+
+import instructions as instr
+from flags import CARRY, IRQB_DISABLE, DECIMAL, OVERFLOW
+
+# Mode is the ADM_ suffix of the instruction module, length is in bytes and cycles are the
+# base cycles without page crossing and decimal mode penalties
+OpcodeInfo = namedtuple("OpcodeInfo", ("mnemonic", "mode", "length", "cycles", "handler"))
+
+
+# Operand fetches wrap around the top of the 64 KB address space like the PC does
+def _operand_byte(code, pc: int) -> int:
+    return code[(pc + 1) & 0xFFFF]
+
+
+def _operand_word(code, pc: int) -> int:
+    return (code[(pc + 2) & 0xFFFF] << 8) + code[(pc + 1) & 0xFFFF]
+
+
+# Raised when the processor fetches an opcode that has no instruction module
+class IllegalOpcodeError(Exception):
+    def __init__(self, opcode: int, pc: int) -> None:
+        super().__init__(f"Illegal opcode {opcode:02X} at {pc:04X}")
+        self.opcode = opcode
+        self.pc = pc
+
+
+def _illegal(opcode: int):
+    def handler(proc, *args) -> None:
+        raise IllegalOpcodeError(opcode, proc.PC)
+
+    return handler
+
+
+_DECODERS = {
+    1: None,
+    2: _operand_byte,
+    3: _operand_word,
+}
+
+
+def _build_tables() -> tuple[tuple, dict]:
+    table = [None] * 0x100
+    assembly = {}  # The first opcode a module lists for an addressing mode is the one that gets assembled
+
+    for name in instr.__all__:
+        module = getattr(instr, name)
+
+        for attr, opcodes in vars(module).items():
+            if not attr.startswith("ADM_"):
+                continue
+
+            handler = getattr(module, attr[4:].lower())
+            if not isinstance(opcodes, tuple):
+                opcodes = (opcodes,)
+
+            assembly.setdefault((module.INSTRUCTION, attr[4:]), opcodes[0])
+            for opcode in opcodes:
+                table[opcode] = OpcodeInfo(module.INSTRUCTION, attr[4:], module.get_opcode_bytes(opcode),
+                                           module.get_opcode_cycles(opcode), handler)
+
+    return tuple(table), assembly
+
+
+# Metadata of every opcode, None for unimplemented opcodes, built once at import time and shared
+# by the core, the CLI, the assembler and the disassembler
+OPCODE_TABLE, _ASSEMBLY = _build_tables()
+
+# Flat 256-entry table of (handler, number of bytes, operand decoder, base cycles) for the run loops,
+# with the mnemonic and addressing mode of every opcode, None for unimplemented opcodes,
+# whose handler raises IllegalOpcodeError
+DISPATCH = tuple(
+    (_illegal(opcode), 1, None, 0) if info is None
+    else (info.handler, info.length, _DECODERS[info.length], info.cycles)
+    for opcode, info in enumerate(OPCODE_TABLE)
+)
+MNEMONICS = tuple(None if info is None else info.mnemonic for info in OPCODE_TABLE)
+MODES = tuple(None if info is None else info.mode for info in OPCODE_TABLE)
+
+# Mnemonic -> opcodes, opcode -> mnemonic and (mnemonic, addressing mode) -> opcode
+INSTRUCTION_SET = MappingProxyType({
+    mnemonic: tuple(opcode for opcode in range(0x100) if MNEMONICS[opcode] == mnemonic)
+    for mnemonic in dict.fromkeys(info.mnemonic for info in OPCODE_TABLE if info is not None)
+})
+OPCODES = MappingProxyType({opcode: info.mnemonic for opcode, info in enumerate(OPCODE_TABLE) if info is not None})
+ASSEMBLY = MappingProxyType(_ASSEMBLY)
+
+# Syntax of the complete W65C02S opcode map, whether implemented or not, for tools that only read
+# machine code such as the disassembler, mnemonic -> addressing mode -> opcode, the modes follow the
+# instruction modules (stack instructions are I) plus ZPPCR for the zero page and relative operands
+# of BBR/BBS, every opcode not listed is an undefined NOP
+OpcodeSyntax = namedtuple("OpcodeSyntax", ("mnemonic", "mode", "length"))
+
+MODE_LENGTHS = {
+    "I": 1, "AA": 1,
+    "IA": 2, "ZP": 2, "ZPIX": 2, "ZPIY": 2, "ZPII": 2, "ZPIIY": 2, "ZPI": 2, "PCR": 2,
+    "A": 3, "AIX": 3, "AIY": 3, "AI": 3, "AII": 3, "ZPPCR": 3,
+}
+
+_SYNTAX = {
+    "ADC": {"IA": 0x69, "ZP": 0x65, "ZPIX": 0x75, "A": 0x6D, "AIX": 0x7D, "AIY": 0x79,
+            "ZPII": 0x61, "ZPIIY": 0x71, "ZPI": 0x72},
+    "AND": {"IA": 0x29, "ZP": 0x25, "ZPIX": 0x35, "A": 0x2D, "AIX": 0x3D, "AIY": 0x39,
+            "ZPII": 0x21, "ZPIIY": 0x31, "ZPI": 0x32},
+    "ASL": {"AA": 0x0A, "ZP": 0x06, "ZPIX": 0x16, "A": 0x0E, "AIX": 0x1E},
+    "BCC": {"PCR": 0x90}, "BCS": {"PCR": 0xB0}, "BEQ": {"PCR": 0xF0}, "BMI": {"PCR": 0x30},
+    "BNE": {"PCR": 0xD0}, "BPL": {"PCR": 0x10}, "BRA": {"PCR": 0x80}, "BVC": {"PCR": 0x50},
+    "BVS": {"PCR": 0x70},
+    "BIT": {"IA": 0x89, "ZP": 0x24, "ZPIX": 0x34, "A": 0x2C, "AIX": 0x3C},
+    "BRK": {"I": 0x00},
+    "CLC": {"I": 0x18}, "CLD": {"I": 0xD8}, "CLI": {"I": 0x58}, "CLV": {"I": 0xB8},
+    "CMP": {"IA": 0xC9, "ZP": 0xC5, "ZPIX": 0xD5, "A": 0xCD, "AIX": 0xDD, "AIY": 0xD9,
+            "ZPII": 0xC1, "ZPIIY": 0xD1, "ZPI": 0xD2},
+    "CPX": {"IA": 0xE0, "ZP": 0xE4, "A": 0xEC},
+    "CPY": {"IA": 0xC0, "ZP": 0xC4, "A": 0xCC},
+    "DEC": {"AA": 0x3A, "ZP": 0xC6, "ZPIX": 0xD6, "A": 0xCE, "AIX": 0xDE},
+    "DEX": {"I": 0xCA}, "DEY": {"I": 0x88},
+    "EOR": {"IA": 0x49, "ZP": 0x45, "ZPIX": 0x55, "A": 0x4D, "AIX": 0x5D, "AIY": 0x59,
+            "ZPII": 0x41, "ZPIIY": 0x51, "ZPI": 0x52},
+    "INC": {"AA": 0x1A, "ZP": 0xE6, "ZPIX": 0xF6, "A": 0xEE, "AIX": 0xFE},
+    "INX": {"I": 0xE8}, "INY": {"I": 0xC8},
+    "JMP": {"A": 0x4C, "AI": 0x6C, "AII": 0x7C},
+    "JSR": {"A": 0x20},
+    "LDA": {"IA": 0xA9, "ZP": 0xA5, "ZPIX": 0xB5, "A": 0xAD, "AIX": 0xBD, "AIY": 0xB9,
+            "ZPII": 0xA1, "ZPIIY": 0xB1, "ZPI": 0xB2},
+    "LDX": {"IA": 0xA2, "ZP": 0xA6, "ZPIY": 0xB6, "A": 0xAE, "AIY": 0xBE},
+    "LDY": {"IA": 0xA0, "ZP": 0xA4, "ZPIX": 0xB4, "A": 0xAC, "AIX": 0xBC},
+    "LSR": {"AA": 0x4A, "ZP": 0x46, "ZPIX": 0x56, "A": 0x4E, "AIX": 0x5E},
+    "NOP": {"I": 0xEA},
+    "ORA": {"IA": 0x09, "ZP": 0x05, "ZPIX": 0x15, "A": 0x0D, "AIX": 0x1D, "AIY": 0x19,
+            "ZPII": 0x01, "ZPIIY": 0x11, "ZPI": 0x12},
+    "PHA": {"I": 0x48}, "PHP": {"I": 0x08}, "PHX": {"I": 0xDA}, "PHY": {"I": 0x5A},
+    "PLA": {"I": 0x68}, "PLP": {"I": 0x28}, "PLX": {"I": 0xFA}, "PLY": {"I": 0x7A},
+    "ROL": {"AA": 0x2A, "ZP": 0x26, "ZPIX": 0x36, "A": 0x2E, "AIX": 0x3E},
+    "ROR": {"AA": 0x6A, "ZP": 0x66, "ZPIX": 0x76, "A": 0x6E, "AIX": 0x7E},
+    "RTI": {"I": 0x40}, "RTS": {"I": 0x60},
+    "SBC": {"IA": 0xE9, "ZP": 0xE5, "ZPIX": 0xF5, "A": 0xED, "AIX": 0xFD, "AIY": 0xF9,
+            "ZPII": 0xE1, "ZPIIY": 0xF1, "ZPI": 0xF2},
+    "SEC": {"I": 0x38}, "SED": {"I": 0xF8}, "SEI": {"I": 0x78},
+    "STA": {"ZP": 0x85, "ZPIX": 0x95, "A": 0x8D, "AIX": 0x9D, "AIY": 0x99,
+            "ZPII": 0x81, "ZPIIY": 0x91, "ZPI": 0x92},
+    "STP": {"I": 0xDB},
+    "STX": {"ZP": 0x86, "ZPIY": 0x96, "A": 0x8E},
+    "STY": {"ZP": 0x84, "ZPIX": 0x94, "A": 0x8C},
+    "STZ": {"ZP": 0x64, "ZPIX": 0x74, "A": 0x9C, "AIX": 0x9E},
+    "TAX": {"I": 0xAA}, "TAY": {"I": 0xA8}, "TSX": {"I": 0xBA}, "TXA": {"I": 0x8A},
+    "TXS": {"I": 0x9A}, "TYA": {"I": 0x98},
+    "TRB": {"ZP": 0x14, "A": 0x1C},
+    "TSB": {"ZP": 0x04, "A": 0x0C},
+    "WAI": {"I": 0xCB},
+    **{f"RMB{bit}": {"ZP": 0x07 | bit << 4} for bit in range(8)},
+    **{f"SMB{bit}": {"ZP": 0x87 | bit << 4} for bit in range(8)},
+    **{f"BBR{bit}": {"ZPPCR": 0x0F | bit << 4} for bit in range(8)},
+    **{f"BBS{bit}": {"ZPPCR": 0x8F | bit << 4} for bit in range(8)},
+}
+
+
+def _build_map() -> tuple:
+    table = [None] * 0x100
+    for mnemonic, modes in _SYNTAX.items():
+        for mode, opcode in modes.items():
+            table[opcode] = OpcodeSyntax(mnemonic, mode, MODE_LENGTHS[mode])
+
+    # Undefined opcodes still fetch the operand bytes of the instruction group they decode as
+    return tuple(
+        OpcodeSyntax("NOP", "I", instr.nop.OPCODE_BYTES.get(opcode, 1)) if syntax is None else syntax
+        for opcode, syntax in enumerate(table)
+    )
+
+
+OPCODE_MAP = _build_map()
+
+# Per-mnemonic semantics shared by the code generators in jit.py and lockstep.py
+
+# Instructions that take an extra cycle when an indexed address crosses a page boundary
+PAGE_PENALTY = frozenset((
+    "LDA", "LDX", "LDY", "ADC", "SBC", "AND", "ORA", "EOR", "CMP",
+    "ASL", "LSR", "ROL", "ROR",
+))
+
+LOADS = {"LDA": "A", "LDX": "X", "LDY": "Y"}  # Mnemonic -> register
+STORES = {"STA": "A", "STX": "X", "STY": "Y"}
+COMPARES = {"CMP": "A", "CPX": "X", "CPY": "Y"}
+LOGIC = {"AND": "&", "ORA": "|", "EOR": "^"}  # Mnemonic -> operator
+TRANSFERS = {"TAX": ("A", "X"), "TXA": ("X", "A"), "TAY": ("A", "Y"), "TYA": ("Y", "A"), "TSX": ("S", "X")}
+STEPS = {"INX": ("X", 1), "INY": ("Y", 1), "DEX": ("X", -1), "DEY": ("Y", -1)}
+FLAG_OPS = {  # Mnemonic -> (flag, value it is set to)
+    "CLC": (CARRY, 0), "SEC": (CARRY, CARRY),
+    "CLI": (IRQB_DISABLE, 0), "SEI": (IRQB_DISABLE, IRQB_DISABLE),
+    "CLD": (DECIMAL, 0), "SED": (DECIMAL, DECIMAL),
+    "CLV": (OVERFLOW, 0),
+}
+SHIFTS = {"ASL": (True, False), "LSR": (False, False), "ROL": (True, True), "ROR": (False, True)}  # (left, rotate)
@@ -0,0 +1,118 @@
+import json
+from array import array
+
+from opcodes import DISPATCH, MNEMONICS, MODES as OPCODE_MODES
+
+HOT_LOOP_THRESHOLD = 16  # Back-edge count that makes a loop hot
+REPORT_TOP = 16  # Entries per section of the text report
+
+MODES = tuple(sorted(set(OPCODE_MODES) - {None}))
+
+
+# Execution profiler, installed as a trace sink so it costs nothing when disabled
+class Profiler:
+    def __init__(self, forward=None) -> None:
+        self.forward = forward  # Trace sink that was installed before the profiler, if any
+
+        self.opcodes = array("Q", bytes(8 * 0x100))  # Executions per opcode
+        self.pcs = array("Q", bytes(8 * 0x10000))  # Executions per PC
+        self.pc_cycles = array("Q", bytes(8 * 0x10000))  # Cycles spent per PC
+        self.back_edges = {}  # (from PC, to PC) -> count of jumps backwards
+
+        self.last_pc = None
+        self.last_cycles = 0
+        self.next_pc = None
+
+    def record(self, proc, pc: int, opcode: int, operands) -> None:
+        handler, num_bytes, decode, cycles = DISPATCH[opcode]
+        # Records come after the instruction retired, it took the cycles since the previous one ended
+        if self.last_pc is None or self.last_cycles > proc.CYCLES:  # First record, or CYCLES was restored
+            self.last_cycles = proc.CYCLES - cycles
+        self.pc_cycles[pc] += proc.CYCLES - self.last_cycles
+
+        if self.last_pc is not None and pc != self.next_pc and pc <= self.last_pc:  # Control went backwards
+            edge = (self.last_pc, pc)
+            self.back_edges[edge] = self.back_edges.get(edge, 0) + 1
+
+        self.opcodes[opcode] += 1
+        self.pcs[pc] += 1
+
+        self.last_pc = pc
+        self.last_cycles = proc.CYCLES
+        self.next_pc = (pc + num_bytes) & 0xFFFF
+
+        if self.forward is not None:
+            self.forward.record(proc, pc, opcode, operands)
+
+    def close(self) -> None:
+        if self.forward is not None:
+            self.forward.close()
+            self.forward = None
+
+    def clear(self) -> None:
+        forward = self.forward
+        self.__init__(forward)
+
+    def mode_counts(self) -> dict:
+        counts = dict.fromkeys(MODES, 0)
+        for opcode, count in enumerate(self.opcodes):
+            if count and OPCODE_MODES[opcode] is not None:
+                counts[OPCODE_MODES[opcode]] += count
+        return counts
+
+    def hot_loops(self, threshold: int = HOT_LOOP_THRESHOLD) -> list:
+        # (start PC, end PC, iterations) of every back edge taken at least threshold times
+        loops = [(dst, src, count) for (src, dst), count in self.back_edges.items() if count >= threshold]
+        return sorted(loops, key=lambda loop: loop[2], reverse=True)
+
+    def to_dict(self) -> dict:
+        return {
+            "instructions": sum(self.opcodes),
+            "opcodes": {
+                f"{opcode:02X}": {"mnemonic": MNEMONICS[opcode], "mode": OPCODE_MODES[opcode], "count": count}
+                for opcode, count in enumerate(self.opcodes) if count
+            },
+            "modes": {mode: count for mode, count in self.mode_counts().items() if count},
+            "pcs": {
+                f"{pc:04X}": {"count": count, "cycles": self.pc_cycles[pc]}
+                for pc, count in enumerate(self.pcs) if count
+            },
+            "hot_loops": [
+                {"start": f"{start:04X}", "end": f"{end:04X}", "iterations": count}
+                for start, end, count in self.hot_loops()
+            ],
+        }
+
+    def report(self, top: int = REPORT_TOP) -> str:
+        total = sum(self.opcodes) or 1
+        lines = [f"{sum(self.opcodes)} instructions"]
+
+        lines.append("Opcodes:")
+        ranked = sorted(range(0x100), key=lambda opcode: self.opcodes[opcode], reverse=True)
+        for opcode in ranked[:top]:
+            if not self.opcodes[opcode]:
+                break
+            lines.append(f"  {opcode:02X} {MNEMONICS[opcode] or '???'} {OPCODE_MODES[opcode] or '':6} "
+                         f"{self.opcodes[opcode]:>12} {100 * self.opcodes[opcode] / total:6.2f}%")
+
+        lines.append("Addressing modes:")
+        for mode, count in sorted(self.mode_counts().items(), key=lambda item: item[1], reverse=True):
+            if count:
+                lines.append(f"  {mode:6} {count:>12} {100 * count / total:6.2f}%")
+
+        lines.append("Hot PCs:")
+        ranked = sorted(range(0x10000), key=lambda pc: self.pc_cycles[pc], reverse=True)
+        for pc in ranked[:top]:
+            if not self.pcs[pc]:
+                break
+            lines.append(f"  {pc:04X} {self.pcs[pc]:>12} executions {self.pc_cycles[pc]:>12} cycles")
+
+        lines.append("Hot loops:")
+        for start, end, count in self.hot_loops()[:top]:
+            lines.append(f"  {start:04X}-{end:04X} {count:>12} iterations")
+
+        return "\n".join(lines)
+
+    def dump(self, path: str) -> None:
+        with open(path, "w") as dump_file:
+            json.dump(self.to_dict(), dump_file, indent=4)
@@ -0,0 +1,218 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from xml.etree import ElementTree
+
+from w65c02s import W65C02S
+
+DEFAULT_CYCLES = 10_000_000  # Per-test cycle limit
+DEFAULT_TIMEOUT = 60.0  # Per-test wall time limit in seconds
+CYCLE_CHUNK = 100_000  # Cycles run between wall time checks
+
+ROM_EXTENSIONS = (".bin", ".rom")
+REGISTERS = ("A", "X", "Y", "S", "P", "PC", "CYCLES")
+
+# Test manifest, a JSON list of tests (or {"tests": [...]}) with paths relative to the manifest:
+# {
+#     "name": "memcpy",
+#     "rom": "memcpy.bin",
+#     "base": "8000",                   load address, hex
+#     "pc": "8000",                     start address, hex, defaults to the reset vector
+#     "cycles": 100000,                 optional, overrides --cycles
+#     "timeout": 5.0,                   optional, overrides --timeout
+#     "expect": {"A": 5, "X": "1F", "memory": {"0200": "05 06 07"}}
+# }
+# Directory mode runs every ROM in the directory, expectations are read from <rom>.json if present
+
+
+def _hex(val) -> int:
+    return int(val, 16) if isinstance(val, str) else val
+
+
+def load_manifest(path: str) -> list:
+    with open(path, "r") as manifest_file:
+        tests = json.load(manifest_file)
+
+    if isinstance(tests, dict):
+        tests = tests["tests"]
+
+    root = os.path.dirname(os.path.abspath(path))
+    for test in tests:
+        test["rom"] = os.path.join(root, test["rom"])
+        test.setdefault("name", os.path.splitext(os.path.basename(test["rom"]))[0])
+
+    return tests
+
+
+def load_directory(path: str) -> list:
+    tests = []
+
+    for file_name in sorted(os.listdir(path)):
+        if not file_name.lower().endswith(ROM_EXTENSIONS):
+            continue
+
+        rom_path = os.path.join(path, file_name)
+        test = {"name": os.path.splitext(file_name)[0], "rom": rom_path}
+
+        if os.path.isfile(rom_path + ".json"):
+            with open(rom_path + ".json", "r") as expect_file:
+                test.update(json.load(expect_file))
+
+        tests.append(test)
+
+    return tests
+
+
+def check_expectations(proc: W65C02S, expect: dict) -> list:
+    failures = []
+
+    for reg in REGISTERS:
+        if reg in expect and getattr(proc, reg) != _hex(expect[reg]):
+            failures.append(f"{reg} is {getattr(proc, reg):02X}, expected {_hex(expect[reg]):02X}")
+
+    for addr, data in expect.get("memory", {}).items():
+        addr = _hex(addr)
+        expected = bytes.fromhex(data) if isinstance(data, str) else bytes(data)
+        actual = bytes(proc.mem_view(addr, addr + len(expected) - 1))
+
+        if actual != expected:
+            failures.append(f"memory at {addr:04X} is {actual.hex(' ').upper()}, "
+                            f"expected {expected.hex(' ').upper()}")
+
+    return failures
+
+
+def run_test(test: dict) -> dict:
+    result = {"name": test["name"], "rom": test["rom"], "status": "passed", "message": "", "cycles": 0}
+    start = time.perf_counter()
+
+    try:
+        with open(test["rom"], "rb") as rom_file:
+            rom = rom_file.read()
+
+        proc = W65C02S(rom)
+        if test.get("jit"):
+            proc.enable_jit()
+
+        proc.load_rom(rom, _hex(test.get("base", 0x8000)))
+        proc.reset()
+        if "pc" in test:
+            proc.PC = _hex(test["pc"])
+
+        cycle_limit = test["cycles"]
+        deadline = start + test["timeout"]
+
+        while True:
+            consumed = proc.run_for_cycles(min(CYCLE_CHUNK, cycle_limit - proc.CYCLES))
+            if proc.STOPPED or proc.WAITING or proc.MEMORY[proc.PC] == 0x00:  # Halted or idle for good
+                failures = check_expectations(proc, test.get("expect", {}))
+                if failures:
+                    result["status"] = "failed"
+                    result["message"] = "; ".join(failures)
+                break
+
+            if proc.CYCLES >= cycle_limit or consumed == 0:
+                result["status"] = "failed"
+                result["message"] = f"Did not halt within {cycle_limit} cycles"
+                break
+
+            if time.perf_counter() > deadline:
+                result["status"] = "timeout"
+                result["message"] = f"Did not halt within {test['timeout']} seconds"
+                break
+
+        result["cycles"] = proc.CYCLES
+    except Exception as exc:
+        result["status"] = "error"
+        result["message"] = f"{type(exc).__name__}: {exc}"
+
+    result["time"] = time.perf_counter() - start
+    return result
+
+
+def run_tests(tests: list, jobs: int = None) -> list:
+    # Several tests per task keeps the IPC overhead down when there are thousands of small ROMs
+    chunk_size = max(1, len(tests) // (4 * (jobs or os.cpu_count() or 1)))
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(run_test, tests, chunksize=chunk_size))
+
+
+def summarize(results: list, elapsed: float) -> dict:
+    summary = {"tests": len(results), "time": elapsed}
+    for status in ("passed", "failed", "timeout", "error"):
+        summary[status] = sum(result["status"] == status for result in results)
+
+    summary["results"] = results
+    return summary
+
+
+def write_json(summary: dict, path: str) -> None:
+    with open(path, "w") as json_file:
+        json.dump(summary, json_file, indent=4)
+
+
+def write_junit(summary: dict, path: str) -> None:
+    suite = ElementTree.Element("testsuite", {
+        "name": "w65c02s",
+        "tests": str(summary["tests"]),
+        "failures": str(summary["failed"] + summary["timeout"]),
+        "errors": str(summary["error"]),
+        "time": f"{summary['time']:.3f}",
+    })
+
+    for result in summary["results"]:
+        case = ElementTree.SubElement(suite, "testcase", {
+            "classname": "w65c02s",
+            "name": result["name"],
+            "time": f"{result['time']:.3f}",
+        })
+
+        if result["status"] in ("failed", "timeout"):
+            ElementTree.SubElement(case, "failure", {"type": result["status"], "message": result["message"]})
+        elif result["status"] == "error":
+            ElementTree.SubElement(case, "error", {"message": result["message"]})
+
+        ElementTree.SubElement(case, "system-out").text = f"cycles: {result['cycles']}"
+
+    ElementTree.ElementTree(suite).write(path, encoding="utf-8", xml_declaration=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("W65C02S ROM test runner")
+    parser.add_argument("path", type=str, help="directory of ROMs or JSON test manifest")
+    parser.add_argument("--jobs", dest="jobs", type=int, help="number of worker processes")
+    parser.add_argument("--cycles", dest="cycles", type=int, default=DEFAULT_CYCLES,
+                        help="default per-test cycle limit")
+    parser.add_argument("--timeout", dest="timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help="default per-test wall time limit in seconds")
+    parser.add_argument("--jit", dest="jit", action="store_true", help="run every test with the JIT enabled")
+    parser.add_argument("--json", dest="json", type=str, help="write a JSON summary to this file")
+    parser.add_argument("--junit", dest="junit", type=str, help="write a JUnit XML summary to this file")
+    _args = parser.parse_args()
+
+    _tests = load_directory(_args.path) if os.path.isdir(_args.path) else load_manifest(_args.path)
+    for _test in _tests:
+        _test.setdefault("cycles", _args.cycles)
+        _test.setdefault("timeout", _args.timeout)
+        _test.setdefault("jit", _args.jit)
+
+    _start = time.perf_counter()
+    _summary = summarize(run_tests(_tests, _args.jobs), time.perf_counter() - _start)
+
+    for _result in _summary["results"]:
+        if _result["status"] != "passed":
+            print(f"{_result['status'].upper():8} {_result['name']}: {_result['message']}")
+
+    print(f"{_summary['tests']} tests, {_summary['passed']} passed, {_summary['failed']} failed, "
+          f"{_summary['timeout']} timed out, {_summary['error']} errors in {_summary['time']:.2f}s")
+
+    if _args.json is not None:
+        write_json(_summary, _args.json)
+    if _args.junit is not None:
+        write_junit(_summary, _args.junit)
+
+    sys.exit(0 if _summary["passed"] == _summary["tests"] else 1)
@@ -0,0 +1,52 @@
+import heapq
+import itertools
+
+NEVER = 1 << 63  # Deadline when no event is scheduled
+
+
+# Cycle-keyed event queue, events are [cycle, sequence, callback] lists on a heap,
+# the sequence keeps events scheduled for the same cycle in FIFO order
+class Scheduler:
+    def __init__(self) -> None:
+        self.events = []
+        self.sequence = itertools.count()
+
+    def schedule(self, cycle: int, callback) -> list:
+        event = [cycle, next(self.sequence), callback]
+        heapq.heappush(self.events, event)
+        return event
+
+    def cancel(self, event: list) -> None:
+        event[2] = None  # Dropped lazily when it reaches the top of the heap
+
+    def next_deadline(self) -> int:
+        events = self.events
+        while events and events[0][2] is None:
+            heapq.heappop(events)
+
+        return events[0][0] if events else NEVER
+
+    def pop_due(self, cycle: int) -> list:
+        due = []
+        events = self.events
+        while events and events[0][0] <= cycle:
+            callback = heapq.heappop(events)[2]
+            if callback is not None:
+                due.append(callback)
+
+        return due
+
+    def pending(self) -> list:
+        # Events that are still to run, in the order they will run
+        return sorted(event for event in self.events if event[2] is not None)
+
+    def replace(self, events: list) -> None:
+        self.events = [list(event) for event in events]
+        heapq.heapify(self.events)
+        self.sequence = itertools.count(max((event[1] for event in self.events), default=-1) + 1)
+
+    def fork(self) -> "Scheduler":
+        scheduler = Scheduler()
+        scheduler.events = [event.copy() for event in self.events]  # Heap order is kept by the copy
+        scheduler.sequence = itertools.count(next(self.sequence))
+        return scheduler
@@ -0,0 +1,133 @@
+import io
+import pickle
+import struct
+
+from bus import PAGE_SIZE, NUM_PAGES
+
+SNAPSHOT_MAGIC = b"W65S"
+SNAPSHOT_VERSION = 3
+
+# Magic, version, A, X, Y, S, P, PC, CYCLES, IRQ_LINES, NMI_PENDING, WAITING, STOPPED, NEXT_EVENT,
+# size of the scheduled events
+SNAPSHOT_HEADER = struct.Struct("<4sBBBBBBHQHBBBQI")
+
+# The header is followed by a bitmap of the pages that hold any non-zero byte, then by the contents
+# of those pages in ascending order and last by the pending scheduler events, pickled, empty if none
+PAGE_MASK_SIZE = NUM_PAGES // 8
+
+_EMPTY_PAGE = bytes(PAGE_SIZE)
+
+
+def _references(proc) -> dict:
+    # id -> persistent id of the objects a snapshot refers to instead of storing them, the processor
+    # and the callbacks of mapped devices and their owners are the ones of the processor it is restored into
+    references = {id(proc): ("proc",)}
+    for kind, callbacks in (("read", proc.PAGE_READERS), ("write", proc.PAGE_WRITERS)):
+        for page, callback in enumerate(callbacks):
+            if callback is None:
+                continue
+            references.setdefault(id(callback), (kind, page, False))
+            owner = getattr(callback, "__self__", None)
+            if owner is not None:
+                references.setdefault(id(owner), (kind, page, True))
+    return references
+
+
+class _EventPickler(pickle.Pickler):
+    def __init__(self, file, proc) -> None:
+        super().__init__(file)
+        self.references = _references(proc)
+
+    def persistent_id(self, obj):
+        return self.references.get(id(obj))
+
+
+class _EventUnpickler(pickle.Unpickler):
+    def __init__(self, file, proc) -> None:
+        super().__init__(file)
+        self.proc = proc
+
+    def persistent_load(self, pid):
+        if pid == ("proc",):
+            return self.proc
+
+        kind, page, owner = pid
+        callback = (self.proc.PAGE_READERS if kind == "read" else self.proc.PAGE_WRITERS)[page]
+        if callback is None:
+            raise ValueError(f"Snapshot has an event for a device that is not mapped at page {page:02X}")
+        return callback.__self__ if owner else callback
+
+
+def _pack_events(proc) -> bytes:
+    events = proc.SCHEDULER.pending()
+    if not events:
+        return b""
+
+    data = io.BytesIO()
+    try:
+        _EventPickler(data, proc).dump(events)
+    except (pickle.PicklingError, AttributeError, TypeError) as exc:
+        raise ValueError("Scheduled callbacks must be module level functions or methods of the processor "
+                         f"or a mapped device to be saved in a snapshot: {exc}") from exc
+    return data.getvalue()
+
+
+def _unpack_events(proc, data) -> list:
+    # Only unpickled when events were scheduled, snapshots are trusted like any other pickle
+    if not data:
+        return []
+    return _EventUnpickler(io.BytesIO(data), proc).load()
+
+
+def pack_state(proc) -> bytes:
+    view = proc.MEMORY_VIEW
+    mask = bytearray(PAGE_MASK_SIZE)
+    chunks = []
+
+    for page in range(NUM_PAGES):
+        data = view[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]
+        if data != _EMPTY_PAGE:
+            mask[page >> 3] |= 1 << (page & 7)
+            chunks.append(data)
+
+    events = _pack_events(proc)
+    header = SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION,
+                                  proc.A, proc.X, proc.Y, proc.S, proc.P, proc.PC, proc.CYCLES,
+                                  proc.IRQ_LINES, proc.NMI_PENDING, proc.WAITING, proc.STOPPED,
+                                  proc.NEXT_EVENT, len(events))
+    return b"".join([header, mask, *chunks, events])
+
+
+def unpack_state(proc, data: bytes) -> None:
+    data = memoryview(data)
+    if data[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+        raise ValueError("Not a W65C02S snapshot")
+    # The header layout depends on the version, check it before unpacking the rest
+    if len(data) > len(SNAPSHOT_MAGIC) and data[len(SNAPSHOT_MAGIC)] != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {data[len(SNAPSHOT_MAGIC)]}")
+    if len(data) < SNAPSHOT_HEADER.size + PAGE_MASK_SIZE:
+        raise ValueError("Snapshot is truncated")
+
+    (magic, version, a, x, y, s, p, pc, cycles,
+     irq_lines, nmi_pending, waiting, stopped, next_event, events_size) = SNAPSHOT_HEADER.unpack_from(data)
+
+    offset = SNAPSHOT_HEADER.size
+    mask = data[offset:offset + PAGE_MASK_SIZE]
+    offset += PAGE_MASK_SIZE
+
+    present = [page for page in range(NUM_PAGES) if mask[page >> 3] & (1 << (page & 7))]
+    if len(data) != offset + len(present) * PAGE_SIZE + events_size:
+        raise ValueError("Snapshot size does not match its page mask")
+    events = _unpack_events(proc, data[len(data) - events_size:])
+
+    view = proc.MEMORY_VIEW
+    view[:] = bytes(len(view))
+    for page in present:
+        view[page * PAGE_SIZE:(page + 1) * PAGE_SIZE] = data[offset:offset + PAGE_SIZE]
+        offset += PAGE_SIZE
+
+    proc.A, proc.X, proc.Y, proc.S, proc.P, proc.PC, proc.CYCLES = a, x, y, s, p, pc, cycles
+    proc.IRQ_LINES, proc.NMI_PENDING = irq_lines, bool(nmi_pending)
+    proc.WAITING, proc.STOPPED = bool(waiting), bool(stopped)
+    proc.SCHEDULER.replace(events)
+    proc.NEXT_EVENT = next_event
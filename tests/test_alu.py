@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+
+import alu
+from flags import CARRY, DECIMAL
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_tables_are_built_on_first_use():
+    code = "import w65c02s, alu; print('ADC_TABLE' in vars(alu))"
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "False"
+
+
+def test_one_slot_per_decimal_and_carry():
+    slots = {alu.table_index(p, 0x00, 0x00) >> 16 for p in range(0x100)}
+    assert slots == {0, 1, 2, 3}
+    assert len(alu.ADC_TABLE) == len(alu.SBC_TABLE) == alu.TABLE_SIZE == 4 << 16
+
+
+def test_decimal_entries():
+    assert alu.ADC_TABLE[alu.table_index(DECIMAL, 0x09, 0x01)] & 0xFF == 0x10
+    assert alu.ADC_TABLE[alu.table_index(DECIMAL | CARRY, 0x99, 0x00)] >> 8 & CARRY
+    assert alu.SBC_TABLE[alu.table_index(DECIMAL | CARRY, 0x10, 0x01)] & 0xFF == 0x09
@@ -0,0 +1,102 @@
+import pytest
+
+from blocks import read_pages
+from opcodes import IllegalOpcodeError
+from w65c02s import W65C02S
+
+MODES = ("interp", "blocks", "jit")
+
+
+def make_proc(mode: str) -> W65C02S:
+    proc = W65C02S()
+    if mode == "blocks":
+        proc.enable_block_cache()
+    elif mode == "jit":
+        proc.enable_jit(threshold=1)
+    return proc
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_instruction_across_end_of_memory(mode):
+    proc = make_proc(mode)
+    proc.MEMORY[0xFFFF] = 0xA9  # LDA #$42, the operand wraps to $0000
+    proc.MEMORY[0x0000:0x0003] = bytes([0x42, 0xE8, 0x00])  # INX
+
+    for _ in range(2):
+        proc.PC, proc.A, proc.X, proc.CYCLES = 0xFFFF, 0x00, 0x00, 0
+        assert proc.run_for_cycles(100) == 4
+        assert (proc.A, proc.X, proc.PC) == (0x42, 0x01, 0x0002)
+
+
+def test_jit_block_ending_in_illegal_opcode():
+    proc = make_proc("jit")
+    proc.load_rom(bytes([0xA9, 0x01, 0xE8, 0x4C, 0x00, 0x80]))  # LDA #$01, INX, JMP $8000 (not implemented)
+
+    for _ in range(3):
+        proc.PC = 0x8000
+        with pytest.raises(IllegalOpcodeError):
+            proc.run_for_cycles(100)
+
+    assert proc.BLOCK_CACHE.compiled[0x8000] is None
+
+
+def test_jit_verify_runs_device_callbacks_once():
+    proc = make_proc("interp")
+    proc.enable_jit(threshold=1, verify=True)
+    proc.load_rom(bytes([0xAD, 0x00, 0xD0, 0x8D, 0x01, 0xD0, 0x8D, 0x00, 0x90, 0xE8, 0x00]))  # LDA, STA, STA, INX
+    proc.map_rom(0x9000, 0x90FF)
+    calls = []
+    proc.map_device(0xD000, 0xD0FF, read=lambda addr: calls.append("read") or 0x5A,
+                    write=lambda addr, val: calls.append(("write", val)))
+
+    for _ in range(3):
+        proc.PC = 0x8000
+        proc.run_for_cycles(100)
+
+    assert proc.BLOCK_CACHE.compiled[0x8000] is not None
+    assert calls == ["read", ("write", 0x5A)] * 3
+    assert proc.MEMORY[0x9000] == 0x00
+
+
+def test_read_pages():
+    assert read_pages("JMP", "A", 0xD000) == ()
+    assert read_pages("LDA", "A", 0xD000) == (0xD0,)
+    assert read_pages("BNE", "PCR", 0xFE) == ()
+    assert read_pages("PLA", "I", None) == (0x01,)
+    assert read_pages("LDA", "ZPI", 0x10) is None
+
+
+def run_poll(mode: str, addr: int, device: bool = False, event_driven: bool = False) -> tuple[int, int]:
+    # Runs LDA addr, NOP as a loop, returns the number of iterations interpreted as a poll and of device reads
+    proc = make_proc(mode)
+    proc.MEMORY[0x0200:0x0205] = bytes([0xAD, addr & 0xFF, addr >> 8, 0xEA, 0x00])
+    reads = []
+    if device:
+        proc.map_device(addr, addr, read=lambda addr: reads.append(addr) or 0x00, event_driven=event_driven)
+
+    cache = proc.BLOCK_CACHE
+    block = cache.translate(0x0200)
+    block = block[:-1] + (block[-1][:2] + (0x0200,) + block[-1][3:],)  # Close the loop, no branches yet
+    cache.blocks[0x0200] = block
+    if cache._is_poll(block):
+        cache.polls.add(0x0200)
+
+    polls = []
+    interpret = cache._interpret
+    cache._interpret = lambda block: polls.append(block) or interpret(block)
+
+    proc.PC = 0x0200
+    proc.run_for_cycles(10_000)
+    assert proc.CYCLES >= 10_000
+    return len(polls), len(reads)
+
+
+@pytest.mark.parametrize("mode", ("blocks", "jit"))
+def test_poll_fast_forward(mode):
+    assert run_poll(mode, 0x0300)[0] < 5
+
+    polls, reads = run_poll(mode, 0xD011, device=True, event_driven=True)
+    assert polls < 5 and reads < 5
+
+    polls, reads = run_poll(mode, 0xD011, device=True)
+    assert reads == 10_000 // 6 + 1  # Every iteration reads the device
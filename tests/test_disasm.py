@@ -0,0 +1,33 @@
+from disasm import CODE_START, format_instruction, trace_code
+from opcodes import OPCODE_MAP, OPCODE_TABLE
+
+
+def test_opcode_map_agrees_with_implemented_opcodes():
+    for syntax, info in zip(OPCODE_MAP, OPCODE_TABLE):
+        if info is not None:
+            assert syntax == (info.mnemonic, info.mode, info.length)
+
+    assert sum(syntax.mnemonic != "NOP" for syntax in OPCODE_MAP) == 211
+
+
+def test_unimplemented_instructions_are_decoded():
+    assert format_instruction(0x4C, b"\x34\x12") == "JMP $1234"
+    assert format_instruction(0x7C, b"\x34\x12") == "JMP ($1234,X)"
+    assert format_instruction(0x20, b"\x34\x12", {0x1234: "INIT"}) == "JSR INIT"
+    assert format_instruction(0x9C, b"\x00\xD0") == "STZ $D000"
+    assert format_instruction(0xD0, b"\xFE", addr=0x8000) == "BNE $8000"
+    assert format_instruction(0xD0, b"\x10", {0x8012: "LOOP"}, 0x8000) == "BNE LOOP"
+    assert format_instruction(0x8F, b"\x12\x03", addr=0x8000) == "BBS0 $12,$8006"
+
+
+def test_descent_follows_control_flow():
+    image = bytearray(0x30)
+    image[0x00:0x08] = bytes([0x20, 0x10, 0x80, 0xF0, 0x01, 0x60, 0x4C, 0x20])  # JSR, BEQ, RTS, JMP
+    image[0x08] = 0x80
+    image[0x10:0x12] = bytes([0x80, 0x02])  # BRA
+    image[0x14] = 0x60  # RTS
+    image[0x20] = 0xDB  # STP
+
+    code = trace_code(image, 0x8000, [0x8000])
+    starts = [offset for offset, kind in enumerate(code) if kind == CODE_START]
+    assert starts == [0x00, 0x03, 0x05, 0x06, 0x10, 0x14, 0x20]
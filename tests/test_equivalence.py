@@ -0,0 +1,120 @@
+import random
+
+import pytest
+
+from opcodes import DISPATCH, MNEMONICS, IllegalOpcodeError
+from w65c02s import W65C02S
+
+# Differential fuzzing, random straight-line programs over every implemented opcode have to leave the
+# same registers and memory behind in the interpreter, the block cache, the JIT and the lockstep engine
+
+OPCODES = [opcode for opcode in range(0x100) if MNEMONICS[opcode] is not None]
+OPERAND_BYTES = (0x00, 0x01, 0x7F, 0x80, 0x81, 0xFF)
+REGISTERS = ("A", "X", "Y", "S", "P", "PC", "CYCLES")
+PROGRAMS = 20  # Per seed
+RUNS = 3  # Runs of each program, the JIT compiles on the first one and runs compiled code from the second
+
+
+def random_case(rng: random.Random) -> tuple:
+    program = bytearray()
+    for _ in range(rng.randrange(1, 40)):
+        opcode = rng.choice(OPCODES)
+        program.append(opcode)
+        for _ in range(DISPATCH[opcode][1] - 1):
+            program.append(rng.choice(OPERAND_BYTES + (rng.randrange(0x100),)))
+    program.append(0x00)
+
+    ram = bytes(rng.randrange(0x100) for _ in range(0x300))  # Zero page, stack and the page after
+    registers = {reg: rng.randrange(0x100) for reg in ("A", "X", "Y", "S")}
+    registers["P"] = rng.randrange(0x100) | 0x20
+    return bytes(program), ram, registers
+
+
+def make_proc(mode: str, program: bytes, ram: bytes) -> W65C02S:
+    proc = W65C02S()
+    proc.MEMORY[:len(ram)] = ram
+    proc.load_rom(program)
+
+    if mode == "blocks":
+        proc.enable_block_cache()
+    elif mode == "jit":
+        proc.enable_jit(threshold=1)
+    return proc
+
+
+def run(mode: str, case: tuple) -> list:
+    program, ram, registers = case
+    proc = make_proc(mode, program, ram)
+    results = []
+
+    for _ in range(RUNS):  # Memory carries over, so self-modified code is run again
+        proc.PC = 0x8000
+        for reg, val in registers.items():
+            setattr(proc, reg, val)
+        proc.WAITING = proc.STOPPED = False
+        proc.NEXT_EVENT = proc.CYCLES
+
+        try:
+            proc.run_for_cycles(10_000)
+            error = None
+        except IllegalOpcodeError as exc:
+            error = str(exc)
+
+        results.append(([getattr(proc, reg) for reg in REGISTERS], bytes(proc.MEMORY), error))
+        if error is not None:
+            break
+
+    return results
+
+
+@pytest.mark.parametrize("mode", ("blocks", "jit"))
+@pytest.mark.parametrize("seed", range(10))
+def test_matches_interpreter(mode, seed):
+    rng = random.Random(seed)
+
+    for _ in range(PROGRAMS):
+        case = random_case(rng)
+        assert run(mode, case) == run("interp", case), case[0].hex()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_lockstep_matches_interpreter(seed):
+    np = pytest.importorskip("numpy")
+    from lockstep import LockstepEngine
+
+    rng = random.Random(seed)
+    lanes = 8
+
+    for _ in range(PROGRAMS):
+        program = random_case(rng)[0]
+        engine = LockstepEngine(lanes)
+        engine.load_rom(program)
+        expected = []
+        failed = False
+
+        for lane in range(lanes):
+            _, ram, registers = random_case(rng)
+            engine.MEMORY[lane, :len(ram)] = np.frombuffer(ram, dtype=np.uint8)
+            engine.PC[lane] = 0x8000
+            for reg, val in registers.items():
+                getattr(engine, reg)[lane] = val
+
+            proc = make_proc("interp", program, ram)
+            proc.PC = 0x8000
+            for reg, val in registers.items():
+                setattr(proc, reg, val)
+            try:
+                proc.execute_from_memory()
+            except IllegalOpcodeError:
+                failed = True
+            expected.append(([getattr(proc, reg) for reg in REGISTERS], bytes(proc.MEMORY)))
+
+        if failed:
+            with pytest.raises(IllegalOpcodeError):
+                engine.run_for_cycles(10_000)
+            continue
+
+        engine.run_for_cycles(10_000)
+        for lane in range(lanes):
+            actual = [int(getattr(engine, reg)[lane]) for reg in REGISTERS], engine.MEMORY[lane].tobytes()
+            assert actual == expected[lane], program.hex()
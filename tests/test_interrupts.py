@@ -0,0 +1,73 @@
+import pytest
+
+from w65c02s import W65C02S
+
+MODES = ("interp", "blocks", "jit")
+HANDLER = 0x9000  # IRQ and NMI vectors point at a halt
+
+RAISE = {
+    "irq": lambda proc: proc.assert_irq(),
+    "nmi": lambda proc: proc.nmi(),
+    "timer": lambda proc: proc.schedule(2, W65C02S.assert_irq),
+}
+
+
+def make_proc(mode: str, program: bytes) -> W65C02S:
+    proc = W65C02S()
+    proc.load_rom(program)
+    proc.MEMORY[0xFFFA:0xFFFC] = HANDLER.to_bytes(2, "little")
+    proc.MEMORY[0xFFFE:0x10000] = HANDLER.to_bytes(2, "little")
+
+    if mode == "blocks":
+        proc.enable_block_cache()
+    elif mode == "jit":
+        proc.enable_jit(threshold=1)
+    return proc
+
+
+def run_once(proc: W65C02S) -> int:
+    # Returns the address the interrupt pushed
+    proc.PC, proc.S, proc.P = 0x8000, 0xFD, 0x20
+    proc.IRQ_LINES = 0
+    proc.run_for_cycles(1000)
+
+    assert proc.PC == HANDLER
+    return proc.MEMORY[0x01FD] << 8 | proc.MEMORY[0x01FC]
+
+
+def return_address(mode: str, access: str, kind: str) -> int:
+    if access == "write":
+        program = bytes([0x8D, 0x00, 0xD0] + [0xE8] * 10 + [0x00])  # STA $D000, INX x 10
+    else:
+        program = bytes([0xAD, 0x00, 0xD0] + [0xE8] * 10 + [0x00])  # LDA $D000, INX x 10
+
+    proc = make_proc(mode, program)
+
+    def read(addr):
+        RAISE[kind](proc)
+        return 0x00
+
+    def write(addr, val):
+        RAISE[kind](proc)
+
+    if access == "write":
+        proc.map_device(0xD000, 0xD0FF, write=write)
+    else:
+        proc.map_device(0xD000, 0xD0FF, read=read)
+
+    pushed = run_once(proc)
+    if mode == "jit":  # The first run compiles the block, the second one runs it
+        assert run_once(proc) == pushed
+        assert proc.BLOCK_CACHE.compiled.get(0x8000) is not None
+    return pushed
+
+
+@pytest.mark.parametrize("access", ("write", "read"))
+@pytest.mark.parametrize("kind", RAISE)
+@pytest.mark.parametrize("mode", MODES)
+def test_device_interrupt_is_taken_mid_block(mode, kind, access):
+    expected = return_address("interp", access, kind)
+    if kind != "timer":
+        assert expected == 0x8003
+
+    assert return_address(mode, access, kind) == expected
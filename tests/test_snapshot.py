@@ -0,0 +1,74 @@
+import pytest
+
+from w65c02s import W65C02S
+
+HANDLER = 0x9000
+
+
+class Timer:
+    def __init__(self) -> None:
+        self.fired = 0
+
+    def read(self, addr: int) -> int:
+        return self.fired
+
+    def expire(self, proc) -> None:
+        self.fired += 1
+        proc.assert_irq()
+
+
+def make_proc() -> W65C02S:
+    # WAI, INX, halt, the IRQ handler is a halt too
+    proc = W65C02S()
+    proc.load_rom(bytes([0xCB, 0xE8, 0x00]))
+    proc.MEMORY[0xFFFE:0x10000] = HANDLER.to_bytes(2, "little")
+    proc.PC, proc.P = 0x8000, 0x20
+    return proc
+
+
+def test_pending_timer_survives_restore():
+    proc = make_proc()
+    proc.schedule(1000, W65C02S.assert_irq)
+    snap = proc.snapshot()
+
+    proc.run_for_cycles(5000)
+    assert (proc.PC, proc.CYCLES) == (HANDLER, 1007)
+
+    restored = make_proc()
+    restored.restore(snap)
+    restored.run_for_cycles(5000)
+    assert (restored.PC, restored.CYCLES) == (HANDLER, 1007)
+
+
+def test_restore_drops_events_of_the_target():
+    snap = make_proc().snapshot()
+
+    proc = make_proc()
+    proc.schedule(10, W65C02S.assert_irq)
+    proc.restore(snap)
+    proc.run_for_cycles(5000)
+    assert proc.PC == 0x8001 and proc.WAITING
+
+
+def test_device_events_are_bound_to_the_restored_device():
+    proc = make_proc()
+    timer = Timer()
+    proc.map_device(0xD000, 0xD0FF, read=timer.read)
+    proc.schedule(50, timer.expire)
+    snap = proc.snapshot()
+
+    restored = make_proc()
+    other = Timer()
+    restored.map_device(0xD000, 0xD0FF, read=other.read)
+    restored.restore(snap)
+    restored.run_for_cycles(5000)
+
+    assert (other.fired, timer.fired) == (1, 0)
+    assert restored.PC == HANDLER
+
+
+def test_unpicklable_callback_is_an_error():
+    proc = make_proc()
+    proc.schedule(50, lambda proc: None)
+    with pytest.raises(ValueError):
+        proc.snapshot()
@@ -0,0 +1,47 @@
+import argparse
+import sys
+
+from disasm import format_instruction
+from opcodes import DISPATCH
+from tracing import BINARY_RECORD, RING_HEADER, RING_MAGIC, RING_RECORD, RING_VERSION
+
+
+def decode_records(data: bytes):
+    # Yields (cycles or None, PC, opcode, operands, A, X, Y, P, S) from a ring dump (18-byte records)
+    # or from the stream written by the binary trace sink (10-byte records), registers and cycles are
+    # the ones each instruction left behind
+    if data[:len(RING_MAGIC)] == RING_MAGIC:
+        magic, version, record_size, count = RING_HEADER.unpack_from(data)
+        if version != RING_VERSION or record_size != RING_RECORD.size:
+            raise ValueError(f"Unsupported ring trace version {version}")
+
+        for pc, opcode, op1, op2, a, x, y, p, s, cycles in RING_RECORD.iter_unpack(data[RING_HEADER.size:]):
+            yield cycles, pc, opcode, bytes((op1, op2))[:DISPATCH[opcode][1] - 1], a, x, y, p, s
+        return
+
+    for pc, opcode, op1, op2, a, x, y, p, s in BINARY_RECORD.iter_unpack(data):
+        yield None, pc, opcode, bytes((op1, op2))[:DISPATCH[opcode][1] - 1], a, x, y, p, s
+
+
+def render(record: tuple) -> str:
+    cycles, pc, opcode, operands, a, x, y, p, s = record
+    code = bytes((opcode,)) + operands
+
+    line = "" if cycles is None else f"{cycles:>12}  "
+    return (line + f"{pc:04X}  {code.hex(' ').upper():<8}  {format_instruction(opcode, operands, addr=pc):<14}"
+            f"A={a:02X} X={x:02X} Y={y:02X} P={p:02X} S={s:02X}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("W65C02S trace decoder")
+    parser.add_argument("trace", type=str, help="ring buffer dump or binary trace file")
+    parser.add_argument("--last", dest="last", type=int, help="only show the last N instructions")
+    _args = parser.parse_args()
+
+    with open(_args.trace, "rb") as _trace_file:
+        _records = list(decode_records(_trace_file.read()))
+
+    if _args.last is not None:
+        _records = _records[-_args.last:]
+
+    sys.stdout.writelines(render(_record) + "\n" for _record in _records)
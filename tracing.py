@@ -0,0 +1,140 @@
+import csv
+import struct
+import sys
+
+from opcodes import MNEMONICS
+
+TRACE_BUFFER_SIZE = 1 << 20  # 1 MB write buffer
+
+# Sinks are called once an instruction retired, registers and cycles are the ones it left behind
+
+# PC, opcode, operand 1, operand 2, A, X, Y, P, S
+BINARY_RECORD = struct.Struct("<HBBBBBBBB")
+
+RING_CAPACITY = 1 << 20  # Records kept by the ring buffer, the last 1M instructions
+RING_MAGIC = b"W65T"
+RING_VERSION = 2
+
+# Magic, version, record size, number of instructions recorded in total (including overwritten ones)
+RING_HEADER = struct.Struct("<4sBBQ")
+# PC, opcode, operand 1, operand 2, A, X, Y, P, S, cycles, 18 bytes
+RING_RECORD = struct.Struct("<HBBBBBBBBQ")
+
+
+class TextTraceSink:
+    def __init__(self, path: str = None) -> None:
+        if path is None or path == "-":
+            self.file = sys.stdout
+        else:
+            self.file = open(path, "w", buffering=TRACE_BUFFER_SIZE)
+
+    def record(self, proc, pc: int, opcode: int, operands) -> None:
+        self.file.write(
+            f"{pc:04X}  {MNEMONICS[opcode]} {operands.hex(' ').upper():<5}  "
+            f"A={proc.A:02X} X={proc.X:02X} Y={proc.Y:02X} P={proc.P:02X} S={proc.S:02X}\n"
+        )
+
+    def close(self) -> None:
+        if self.file is sys.stdout:
+            self.file.flush()
+        else:
+            self.file.close()
+
+
+class CsvTraceSink:
+    def __init__(self, path: str = None) -> None:
+        if path is None or path == "-":
+            self.file = sys.stdout
+        else:
+            self.file = open(path, "w", newline="", buffering=TRACE_BUFFER_SIZE)
+
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(("PC", "OPCODE", "MNEMONIC", "OPERANDS", "A", "X", "Y", "P", "S"))
+
+    def record(self, proc, pc: int, opcode: int, operands) -> None:
+        self.writer.writerow((
+            f"{pc:04X}", f"{opcode:02X}", MNEMONICS[opcode], operands.hex().upper(),
+            f"{proc.A:02X}", f"{proc.X:02X}", f"{proc.Y:02X}", f"{proc.P:02X}", f"{proc.S:02X}",
+        ))
+
+    def close(self) -> None:
+        if self.file is sys.stdout:
+            self.file.flush()
+        else:
+            self.file.close()
+
+
+class BinaryTraceSink:
+    def __init__(self, path: str = None) -> None:
+        if path is None or path == "-":
+            self.file = sys.stdout.buffer
+        else:
+            self.file = open(path, "wb", buffering=TRACE_BUFFER_SIZE)
+
+        self.pack = BINARY_RECORD.pack
+
+    def record(self, proc, pc: int, opcode: int, operands) -> None:
+        op1 = operands[0] if len(operands) > 0 else 0x00
+        op2 = operands[1] if len(operands) > 1 else 0x00
+
+        self.file.write(self.pack(pc, opcode, op1, op2, proc.A, proc.X, proc.Y, proc.P, proc.S))
+
+    def close(self) -> None:
+        if self.file is sys.stdout.buffer:
+            self.file.flush()
+        else:
+            self.file.close()
+
+
+class RingTraceSink:
+    # Keeps the last capacity records in memory, written out oldest first on dump() and close()
+    def __init__(self, path: str = None, capacity: int = RING_CAPACITY) -> None:
+        self.path = path
+        self.capacity = capacity
+        self.buffer = bytearray(capacity * RING_RECORD.size)
+        self.count = 0  # Instructions recorded in total
+
+        self.pack_into = RING_RECORD.pack_into
+
+    def record(self, proc, pc: int, opcode: int, operands) -> None:
+        op1 = operands[0] if len(operands) > 0 else 0x00
+        op2 = operands[1] if len(operands) > 1 else 0x00
+
+        self.pack_into(self.buffer, (self.count % self.capacity) * RING_RECORD.size,
+                       pc, opcode, op1, op2, proc.A, proc.X, proc.Y, proc.P, proc.S, proc.CYCLES)
+        self.count += 1
+
+    def records(self) -> bytes:
+        # Recorded instructions oldest first
+        split = (self.count % self.capacity) * RING_RECORD.size
+        if self.count <= self.capacity:
+            return bytes(self.buffer[:split])
+        return bytes(self.buffer[split:] + self.buffer[:split])
+
+    def dump(self, path: str = None) -> None:
+        path = self.path if path is None else path
+        header = RING_HEADER.pack(RING_MAGIC, RING_VERSION, RING_RECORD.size, self.count)
+
+        if path is None or path == "-":
+            sys.stdout.buffer.write(header + self.records())
+            sys.stdout.buffer.flush()
+            return
+
+        with open(path, "wb") as dump_file:
+            dump_file.write(header)
+            dump_file.write(self.records())
+
+    def close(self) -> None:
+        self.dump()
+
+
+TRACE_SINKS = {
+    "text": TextTraceSink,
+    "csv": CsvTraceSink,
+    "binary": BinaryTraceSink,
+    "ring": RingTraceSink,
+}
+
+
+def make_trace_sink(fmt: str, path: str = None):
+    return TRACE_SINKS[fmt](path)
@@ -1,10 +1,47 @@
 import argparse
+import copy
+from types import MappingProxyType
 
-import instructions as instr
-from cli import w65c02s_interface
+from flags import (CARRY, ZERO, IRQB_DISABLE, DECIMAL, BRK_COMMAND, OVERFLOW, NEGATIVE,
+                   NZ, NZ_FLAGS, FLAG_BITS)
+from blocks import BlockCache
+from bus import TRAP_CODE, TRAP_MAPPED, NUM_PAGES, pages, rom_write
+from jit import JIT_THRESHOLD, JitCache
+from opcodes import DISPATCH, INSTRUCTION_SET, OPCODES
+from scheduler import NEVER, Scheduler
+from snapshot import pack_state, unpack_state
+from tracing import TRACE_SINKS, make_trace_sink
+
+DEBUG_BITMAPS = ("BREAKPOINTS", "WATCH_READS", "WATCH_WRITES")
+EMPTY_BITMAP = bytes(0x10000)  # Shared by every debug bitmap with nothing set, replaced on the first set
 
 # W65C02S Microprocessor
 class W65C02S:
+    # Fixed register file and machine state, __dict__ is only allocated once watchpoints shadow mem_read/mem_write
+    __slots__ = (
+        "A", "X", "Y", "PC", "S", "P_RAW", "NZ_RESULT", "CYCLES",
+        "MEMORY", "MEMORY_VIEW", "PAGE_READERS", "PAGE_WRITERS", "WRITE_TRAPS", "DEVICE_PAGES", "EVENT_PAGES",
+        "STACK_START", "STACK_END", "NMI_VECTOR", "RESET_VECTOR", "IRQ_VECTOR",
+        "SCHEDULER", "NEXT_EVENT", "IRQ_LINES", "NMI_PENDING", "WAITING", "STOPPED",
+        "ROM", "TRACE", "PROFILER", "BLOCK_CACHE",
+        "BREAKPOINTS", "BREAK_CONDITIONS", "WATCH_READS", "WATCH_WRITES", "DEBUG_ACTIVE", "STOP_REASON",
+        "__dict__",
+    )
+
+    # Opcode metadata shared by every instance, see opcodes.py
+    INSTRUCTION_SET = INSTRUCTION_SET
+    OPCODES = OPCODES
+
+    P_FLAGS = MappingProxyType({
+        "CARRY":        CARRY,
+        "ZERO":         ZERO,
+        "IRQB_DISABLE": IRQB_DISABLE,
+        "DECIMAL":      DECIMAL,
+        "BRK_COMMAND":  BRK_COMMAND,
+        "OVERFLOW":     OVERFLOW,
+        "NEGATIVE":     NEGATIVE,
+    })
+
     def __init__(self, rom: bytes = None) -> None:
         self.A = 0x00  # Accumulator A
         self.Y = 0x00  # Index register Y
@@ -12,98 +49,47 @@ class W65C02S:
 
         self.PC = 0x0000  # Program counter PC
         self.S = 0xFD  # Stack Pointer S
-        self.P = 0b00100100  # Processor status register P
-
-        self.P_FLAGS = {
-            "CARRY":        0b00000001,  # Carry 1 = True
-            "ZERO":         0b00000010,  # Zero 1 = True
-            "IRQB_DISABLE": 0b00000100,  # IRQB disable 1 = disable
-            "DECIMAL":      0b00001000,  # Decimal mode 1 = True
-            "BRK_COMMAND":  0b00010000,  # BRK command 1 = BRK, 0 = IRQB
-            "OVERFLOW":     0b01000000,  # Overflow 1 = True
-            "NEGATIVE":     0b10000000,  # Negative 1 = True
-        }
-
-        self.MEMORY = [0x00] * 0x10000  # 64 KB
+        self.P_RAW = 0b00100100  # Processor status register P as the handlers leave it, N and Z may be stale
+        self.NZ_RESULT = None  # Last result byte N and Z are derived from, None when they are up to date in P_RAW
+
+        self.CYCLES = 0  # Elapsed clock cycles
+
+        self.MEMORY = bytearray(0x10000)  # 64 KB
+        self.MEMORY_VIEW = memoryview(self.MEMORY)  # Zero-copy view for dumps, snapshots and bulk loads
+
+        # 256-page memory bus, RAM and ROM reads and RAM writes go straight to MEMORY
+        self.PAGE_READERS = [None] * NUM_PAGES  # Device read callbacks, None reads MEMORY
+        self.PAGE_WRITERS = [None] * NUM_PAGES  # ROM/device write callbacks, None writes MEMORY
+        self.WRITE_TRAPS = bytearray(NUM_PAGES)  # Pages whose writes leave the fast path, see bus.py
+        self.DEVICE_PAGES = 0  # Number of pages with a device read callback
+        self.EVENT_PAGES = bytearray(NUM_PAGES)  # 1 = device reads only change at scheduled events, see blocks.py
         self.STACK_START = 0x0100  # Stack start memory address
         self.STACK_END = 0x01FF  # Stack end memory address
 
-        self.INSTRUCTION_SET = {
-            # All unused opcodes are NOPs in 65C02
-            "NOP": (0x02, 0x03, 0x0B, 0x13, 0x1B,
-                    0x22, 0x23, 0x2B, 0x33, 0x3B,
-                    0x42, 0x43, 0x44, 0x4B, 0x53,
-                    0x5B, 0x5C, 0x62, 0x63, 0x6B,
-                    0x73, 0x7B, 0x82, 0x83, 0x8B,
-                    0x93, 0x9B, 0xA3, 0xAB, 0xB3,
-                    0xBB, 0xC2, 0xC3, 0xCB, 0xD3,
-                    0xD4, 0xDB, 0xDC, 0xE2, 0xE3,
-                    0xEB, 0xF3, 0xF4, 0xFB, 0xFC),
-
-            # Flag instructions
-            "CLC": 0x18,  # Clear Carry
-            "SEC": 0x38,  # Set Carry
-            "CLI": 0x58,  # Clear Interrupt
-            "SEI": 0x78,  # Set Interrupt
-            "CLV": 0xB8,  # Clear Overflow
-            "CLD": 0xD8,  # Clear Decimal
-            "SED": 0xF8,  # Set Decimal
-
-            # Register instructions
-            "TAX": 0xAA,  # Transfer A to X
-            "TXA": 0x8A,  # Transfer X to A
-            "DEX": 0xCA,  # Decrement X
-            "INX": 0xE8,  # Increment X
-            "TAY": 0xA8,  # Transfer A to Y
-            "TYA": 0x98,  # Transfer Y to A
-            "DEY": 0x88,  # Decrement Y
-            "INY": 0xC8,  # Increment Y
-
-            # Stack instructions
-            "TXS": 0x9A,  # Transfer X to Stack ptr
-            "TSX": 0xBA,  # Transfer Stack ptr to X
-            "PHA": 0x48,  # Push Accumulator
-            "PLA": 0x68,  # Pull Accumulator
-            "PHP": 0x08,  # Push Processor status
-            "PLP": 0x28,  # Pull Processor status
-
-            # LOAD and STORE instructions
-            "LDA": (0xA9, 0xA5, 0xB5, 0xAD, 0xBD, 0xB9, 0xA1, 0xB1),
-            "LDX": (0xA2, 0xA6, 0xB6, 0xAE, 0xBE),
-            "LDY": (0xA0, 0xA4, 0xB4, 0xAC, 0xBC),
-            "STA": (0x85, 0x95, 0x8D, 0x9D, 0x99, 0x81, 0x91),
-            "STX": (0x86, 0x96, 0x8E),
-            "STY": (0x84, 0x94, 0x8C),
-
-            # Arithmetic and logic instructions
-            "INC": (0xE6, 0xF6, 0xEE, 0xFE),
-            "DEC": (0xC6, 0xD6, 0xCE, 0xDE),
-            "ADC": (0x69, 0x65, 0x75, 0x6D, 0x7D, 0x79, 0x61, 0x71),
-            "SBC": (0xE9, 0xE5, 0xF5, 0xED, 0xFD, 0xF9, 0xE1, 0xF1),
-            "AND": (0x29, 0x25, 0x35, 0x2D, 0x3D, 0x39, 0x21, 0x31),
-            "ORA": (0x09, 0x05, 0x15, 0x0D, 0x1D, 0x19, 0x01, 0x11),
-            "EOR": (0x49, 0x45, 0x55, 0x4D, 0x5D, 0x59, 0x41, 0x51),
-            "CMP": (0xC9, 0xC5, 0xD5, 0xCD, 0xDD, 0xD9, 0xC1, 0xD1),
-            "CPX": (0xE0, 0xE4, 0xEC),
-            "CPY": (0xC0, 0xC4, 0xCC),
-
-            # Shift and rotate instructions
-            "ASL": (0x0A, 0x06, 0x16, 0x0E, 0x1E),
-            "LSR": (0x4A, 0x46, 0x56, 0x4E, 0x5E),
-            "ROL": (0x2A, 0x26, 0x36, 0x2E, 0x3E),
-            "ROR": (0x6A, 0x66, 0x76, 0x6E, 0x7E),
-
-        }
-
-        self.OPCODES = {}
-        for instruction, opcodes in self.INSTRUCTION_SET.items():
-            if isinstance(opcodes, tuple):
-                for opcode in opcodes:
-                    self.OPCODES[opcode] = instruction
-            else:
-                self.OPCODES[opcodes] = instruction
+        self.NMI_VECTOR = 0xFFFA  # NMIB vector address
+        self.RESET_VECTOR = 0xFFFC  # RESB vector address
+        self.IRQ_VECTOR = 0xFFFE  # IRQB/BRK vector address
+
+        # Interrupts and device timing, the run loops only compare CYCLES against NEXT_EVENT
+        self.SCHEDULER = Scheduler()  # Cycle-keyed device events, see scheduler.py
+        self.NEXT_EVENT = NEVER  # Cycle at which service_events must run next
+        self.IRQ_LINES = 0  # Number of devices holding IRQB low
+        self.NMI_PENDING = False  # Set on a falling edge of NMIB
+        self.WAITING = False  # Set by WAI until an interrupt line is asserted
+        self.STOPPED = False  # Set by STP until reset
 
         self.ROM = rom
+        self.TRACE = None  # Optional trace sink, see tracing.py
+        self.PROFILER = None  # Optional profiler, installed in front of TRACE, see profiler.py
+
+        # Debugging, runs only take the slower checked loop while something is set
+        self.BREAKPOINTS = EMPTY_BITMAP  # 1 = stop before executing the instruction at this address
+        self.BREAK_CONDITIONS = {}  # Address -> callable(proc) -> bool, for conditional breakpoints
+        self.WATCH_READS = EMPTY_BITMAP  # 1 = stop after an instruction reads this address
+        self.WATCH_WRITES = EMPTY_BITMAP  # 1 = stop after an instruction writes this address
+        self.DEBUG_ACTIVE = False  # Any breakpoint or watchpoint set
+        self.STOP_REASON = None  # ("break" | "read" | "write", address) of the last stop
+        self.BLOCK_CACHE = None  # Optional basic-block cache, see blocks.py
 
     @staticmethod
     def unsigned_byte(val: hex) -> hex:
@@ -116,10 +102,58 @@ class W65C02S:
         return val
 
     def mem_read(self, addr: hex) -> hex:
-        return self.MEMORY[addr]
+        read = self.PAGE_READERS[addr >> 8]
+        if read is None:
+            return self.MEMORY[addr]
+        return read(addr)
     
     def mem_write(self, addr: hex, val: hex) -> None:
-        self.MEMORY[addr] = self.unsigned_byte(val)
+        if self.WRITE_TRAPS[addr >> 8]:
+            self.trapped_write(addr, val)
+        else:
+            self.MEMORY[addr] = val & 0xFF
+
+    def trapped_write(self, addr: int, val: int) -> None:
+        page = addr >> 8
+
+        write = self.PAGE_WRITERS[page]
+        if write is None:
+            self.MEMORY[addr] = val & 0xFF
+        else:
+            write(addr, val & 0xFF)
+
+        if self.WRITE_TRAPS[page] & TRAP_CODE:
+            self.BLOCK_CACHE.invalidate_page(page)
+
+    def _map_pages(self, start: int, end: int, read, write, event_driven: bool = False) -> None:
+        for page in pages(start, end):
+            if self.PAGE_READERS[page] is not None:
+                self.DEVICE_PAGES -= 1
+            if read is not None:
+                self.DEVICE_PAGES += 1
+
+            self.PAGE_READERS[page] = read
+            self.PAGE_WRITERS[page] = write
+            self.EVENT_PAGES[page] = event_driven
+
+            if write is None:
+                self.WRITE_TRAPS[page] &= ~TRAP_MAPPED
+            else:
+                self.WRITE_TRAPS[page] |= TRAP_MAPPED
+
+        if self.BLOCK_CACHE is not None:
+            self.BLOCK_CACHE.flush()
+
+    def map_ram(self, start: int, end: int) -> None:
+        self._map_pages(start, end, None, None)
+
+    def map_rom(self, start: int, end: int) -> None:
+        self._map_pages(start, end, None, rom_write)
+
+    def map_device(self, start: int, end: int, read=None, write=None, event_driven: bool = False) -> None:
+        # Missing callbacks fall back to the backing MEMORY, event_driven declares that read only returns
+        # a different value after a scheduled event ran, which lets polling loops on it be fast-forwarded
+        self._map_pages(start, end, read, write, event_driven)
     
     def stk_pull(self) -> hex:
         self.S = (self.S + 0x01) & 0xFF  # Increment S (if >255 wrap around to 0)
@@ -129,72 +163,450 @@ class W65C02S:
         self.mem_write(self.STACK_START + self.S, val)
         self.S = (self.S - 0x01) & 0xFF  # Decrement S (if <0 wrap around to 255)
 
+    @property
+    def P(self) -> int:
+        # Handlers only record the result byte in NZ_RESULT, N and Z are folded in whenever P is read
+        self.sync_flags()
+        return self.P_RAW
+
+    @P.setter
+    def P(self, val: int) -> None:
+        self.P_RAW = val
+        self.NZ_RESULT = None
+
+    def sync_flags(self) -> None:
+        if self.NZ_RESULT is not None:
+            self.P_RAW = (self.P_RAW & ~NZ) | NZ_FLAGS[self.NZ_RESULT]
+            self.NZ_RESULT = None
+
     def set_flags(self, *flags) -> None:
         for flag in flags:
-            # SET FLAGS
-            if flag == "C":
-                self.P |= self.P_FLAGS["CARRY"]
-            elif flag == "Z":
-                self.P |= self.P_FLAGS["ZERO"]
-            elif flag == "I":
-                self.P |= self.P_FLAGS["IRQB_DISABLE"]
-            elif flag == "D":
-                self.P |= self.P_FLAGS["DECIMAL"]
-            elif flag == "B":
-                self.P |= self.P_FLAGS["BRK_COMMAND"]
-            elif flag == "V":
-                self.P |= self.P_FLAGS["OVERFLOW"]
-            elif flag == "N":
-                self.P |= self.P_FLAGS["NEGATIVE"]
-
-            # DISABLE FLAGS
-            elif flag == "!C":
-                self.P &= ~self.P_FLAGS["CARRY"]
-            elif flag == "!Z":
-                self.P &= ~self.P_FLAGS["ZERO"]
-            elif flag == "!I":
-                self.P &= ~self.P_FLAGS["IRQB_DISABLE"]
-            elif flag == "!D":
-                self.P &= ~self.P_FLAGS["DECIMAL"]
-            elif flag == "!B":
-                self.P &= ~self.P_FLAGS["BRK_COMMAND"]
-            elif flag == "!V":
-                self.P &= ~self.P_FLAGS["OVERFLOW"]
-            elif flag == "!N":
-                self.P &= ~self.P_FLAGS["NEGATIVE"]
+            if flag is None:
+                continue
+
+            if flag.startswith("!"):
+                self.P &= ~FLAG_BITS[flag[1:]]  # DISABLE FLAG
+            else:
+                self.P |= FLAG_BITS[flag]  # SET FLAG
+
+    def mem_view(self, addr1: int, addr2: int) -> memoryview:
+        return self.MEMORY_VIEW[addr1:addr2 + 1]
+
+    def load_rom(self, rom: bytes, base: int = 0x8000) -> None:
+        if not 0 <= base <= 0x10000 - len(rom):
+            raise ValueError(f"ROM of {len(rom)} bytes does not fit in memory at {base:04X}")
+
+        self.MEMORY_VIEW[base:base + len(rom)] = rom
+
+        if self.BLOCK_CACHE is not None:
+            self.BLOCK_CACHE.flush()
+
+    def enable_block_cache(self) -> None:
+        self.BLOCK_CACHE = BlockCache(self)
+
+    def enable_jit(self, threshold: int = JIT_THRESHOLD, verify: bool = False) -> None:
+        self.BLOCK_CACHE = JitCache(self, threshold, verify)
+
+    def snapshot(self) -> bytes:
+        return pack_state(self)
+
+    def restore(self, data: bytes) -> None:
+        unpack_state(self, data)
+
+        if self.BLOCK_CACHE is not None:
+            self.BLOCK_CACHE.flush()
+
+    def fork(self) -> "W65C02S":
+        # Tables that are never written after __init__ and the bus callbacks are shared,
+        # RAM is a single 64 KB copy and translated blocks are carried over to the child
+        child = copy.copy(self)
+        child.MEMORY = bytearray(self.MEMORY)
+        child.MEMORY_VIEW = memoryview(child.MEMORY)
+        child.PAGE_READERS = self.PAGE_READERS.copy()
+        child.PAGE_WRITERS = self.PAGE_WRITERS.copy()
+        child.WRITE_TRAPS = bytearray(self.WRITE_TRAPS)
+        child.EVENT_PAGES = bytearray(self.EVENT_PAGES)
+        child.TRACE = None
+        child.PROFILER = None
+        child.SCHEDULER = self.SCHEDULER.fork()
+        child.BREAK_CONDITIONS = self.BREAK_CONDITIONS.copy()
+        for name in DEBUG_BITMAPS:
+            if getattr(self, name) is not EMPTY_BITMAP:
+                setattr(child, name, bytearray(getattr(self, name)))
+        child._update_debug()  # Rebinds the watched accessors to the child
+
+        if self.BLOCK_CACHE is not None:
+            child.BLOCK_CACHE = self.BLOCK_CACHE.fork(child)
+
+        return child
+
+    def enable_profiler(self) -> "Profiler":
+        from profiler import Profiler  # Only loaded when profiling, keeps startup short
+
+        if self.PROFILER is None:
+            self.PROFILER = Profiler(self.TRACE)
+            self.TRACE = self.PROFILER
+        return self.PROFILER
+
+    def disable_profiler(self) -> None:
+        if self.PROFILER is not None:
+            self.TRACE = self.PROFILER.forward
+            self.PROFILER = None
+
+    def schedule(self, delay: int, callback) -> list:
+        # Calls callback(proc) once CYCLES has advanced by delay, returns the event for cancel_event
+        event = self.SCHEDULER.schedule(self.CYCLES + delay, callback)
+        self._event_at(event[0])
+        return event
+
+    def _event_at(self, cycle: int) -> None:
+        if cycle < self.NEXT_EVENT:
+            self.NEXT_EVENT = cycle
+            if self.BLOCK_CACHE is not None:  # Called from a device callback, end the running block here
+                self.BLOCK_CACHE.dirty = True
+
+    def cancel_event(self, event: list) -> None:
+        self.SCHEDULER.cancel(event)
+
+    def assert_irq(self) -> None:
+        self.IRQ_LINES += 1
+        self._event_at(self.CYCLES)
+
+    def release_irq(self) -> None:
+        self.IRQ_LINES = max(self.IRQ_LINES - 1, 0)
+
+    def nmi(self) -> None:
+        self.NMI_PENDING = True
+        self._event_at(self.CYCLES)
+
+    def interrupt(self, vector: int) -> None:
+        self.stk_push(self.PC >> 8)
+        self.stk_push(self.PC & 0xFF)
+        self.stk_push((self.P | 0b00100000) & ~BRK_COMMAND)  # B is only set in the copy pushed by BRK
+
+        self.P = (self.P | IRQB_DISABLE) & ~DECIMAL  # The 65C02 also clears D
+        self.PC = (self.mem_read(vector + 1) << 8) + self.mem_read(vector)
+        self.CYCLES += 7
+
+    def service_events(self, deadline: int = None) -> bool:
+        # Runs due device events and takes a pending interrupt, called at instruction boundaries,
+        # returns False when the run has to end (STP, or WAI with nothing to wake up before deadline)
+        for callback in self.SCHEDULER.pop_due(self.CYCLES):
+            callback(self)
+
+        if self.STOPPED:
+            self.NEXT_EVENT = self.CYCLES
+            return False
+
+        while self.WAITING and not self.NMI_PENDING and not self.IRQ_LINES:
+            # Skip the idle cycles straight to the next event
+            next_event = self.SCHEDULER.next_deadline()
+            if next_event == NEVER or (deadline is not None and next_event >= deadline):
+                if deadline is not None:
+                    self.CYCLES = max(self.CYCLES, deadline)
+                self.NEXT_EVENT = self.CYCLES
+                return False
+
+            self.CYCLES = max(self.CYCLES, next_event)
+            for callback in self.SCHEDULER.pop_due(self.CYCLES):
+                callback(self)
+
+        self.WAITING = False
+
+        if self.NMI_PENDING:
+            self.NMI_PENDING = False
+            self.interrupt(self.NMI_VECTOR)
+        elif self.IRQ_LINES and not self.P_RAW & IRQB_DISABLE:
+            self.interrupt(self.IRQ_VECTOR)
+
+        self.NEXT_EVENT = self.SCHEDULER.next_deadline()
+        if self.IRQ_LINES and self.P_RAW & IRQB_DISABLE:
+            self.NEXT_EVENT = self.CYCLES  # Masked IRQ, keep checking until I is cleared or the line released
+
+        return True
+
+    def _watched_read(self, addr: int) -> int:
+        if self.WATCH_READS[addr]:
+            self.STOP_REASON = ("read", addr)
+        return W65C02S.mem_read(self, addr)
+
+    def _watched_write(self, addr: int, val: int) -> None:
+        if self.WATCH_WRITES[addr]:
+            self.STOP_REASON = ("write", addr)
+        W65C02S.mem_write(self, addr, val)
+
+    def _bitmap(self, name: str) -> bytearray:
+        bitmap = getattr(self, name)
+        if bitmap is EMPTY_BITMAP:
+            bitmap = bytearray(0x10000)
+            setattr(self, name, bitmap)
+        return bitmap
+
+    def _update_debug(self) -> None:
+        # Bitmaps that were cleared go back to the shared empty one
+        for name in DEBUG_BITMAPS:
+            if getattr(self, name).find(1) == -1:
+                setattr(self, name, EMPTY_BITMAP)
+
+        # Watched accessors shadow mem_read/mem_write only while a watchpoint of that kind exists
+        watch_reads = self.WATCH_READS is not EMPTY_BITMAP
+        watch_writes = self.WATCH_WRITES is not EMPTY_BITMAP
+
+        if watch_reads:
+            self.mem_read = self._watched_read
+        else:
+            self.__dict__.pop("mem_read", None)
+
+        if watch_writes:
+            self.mem_write = self._watched_write
+        else:
+            self.__dict__.pop("mem_write", None)
+
+        self.DEBUG_ACTIVE = watch_reads or watch_writes or self.BREAKPOINTS is not EMPTY_BITMAP
+
+    def set_breakpoint(self, addr: int, condition=None) -> None:
+        self._bitmap("BREAKPOINTS")[addr] = 1
+        if condition is None:
+            self.BREAK_CONDITIONS.pop(addr, None)
+        else:
+            self.BREAK_CONDITIONS[addr] = condition
+        self._update_debug()
+
+    def clear_breakpoint(self, addr: int = None) -> None:
+        # Clears every breakpoint when no address is given
+        if addr is None:
+            self.BREAKPOINTS = EMPTY_BITMAP
+            self.BREAK_CONDITIONS.clear()
+        else:
+            if self.BREAKPOINTS[addr]:
+                self.BREAKPOINTS[addr] = 0
+            self.BREAK_CONDITIONS.pop(addr, None)
+        self._update_debug()
+
+    def set_watchpoint(self, addr: int, read: bool = False, write: bool = True) -> None:
+        if read or self.WATCH_READS[addr]:
+            self._bitmap("WATCH_READS")[addr] = read
+        if write or self.WATCH_WRITES[addr]:
+            self._bitmap("WATCH_WRITES")[addr] = write
+        self._update_debug()
+
+    def clear_watchpoint(self, addr: int = None) -> None:
+        # Clears every watchpoint when no address is given
+        if addr is None:
+            self.WATCH_READS = EMPTY_BITMAP
+            self.WATCH_WRITES = EMPTY_BITMAP
+            self._update_debug()
+        else:
+            self.set_watchpoint(addr, read=False, write=False)
+
+    def reset(self) -> None:
+        self.S = 0xFD
+        self.P = 0b00100100
+        self.WAITING = False
+        self.STOPPED = False
+        self.NEXT_EVENT = self.CYCLES  # Recomputed on the first instruction boundary
+        self.PC = (self.MEMORY[self.RESET_VECTOR + 1] << 8) + self.MEMORY[self.RESET_VECTOR]
+
+    def execute_from_memory(self) -> None:
+        if self.DEBUG_ACTIVE:
+            self.run_debug()
+            return
+
+        memory = self.MEMORY
+        view = self.MEMORY_VIEW
+        trace = self.TRACE
+        dispatch = DISPATCH
+
+        # PC is kept in a local between instructions, handlers don't move it, only interrupt entry does
+        pc = self.PC
+        while True:
+            if self.CYCLES >= self.NEXT_EVENT:
+                if not self.service_events():
+                    return
+                pc = self.PC
+
+            opcode = memory[pc]
+            if opcode == 0x00:
+                return
+
+            handler, num_bytes, decode, cycles = dispatch[opcode]
+            self.CYCLES += cycles
+
+            if decode is None:
+                handler(self)
+            else:
+                handler(self, decode(memory, pc))
+
+            if trace is not None:  # Retired instruction, with the registers and cycle count it left behind
+                trace.record(self, pc, opcode, view[pc + 1:pc + num_bytes])
+
+            self.PC = pc = (pc + num_bytes) & 0xFFFF
+
+    def run_for_cycles(self, cycles: int) -> int:
+        if self.DEBUG_ACTIVE:
+            return self.run_debug(cycles)
+
+        if self.BLOCK_CACHE is not None and self.TRACE is None:
+            return self.BLOCK_CACHE.run(cycles)
+
+        memory = self.MEMORY
+        view = self.MEMORY_VIEW
+        trace = self.TRACE
+        dispatch = DISPATCH
+        start = self.CYCLES
+        deadline = start + cycles
+
+        pc = self.PC
+        while self.CYCLES < deadline:
+            if self.CYCLES >= self.NEXT_EVENT:
+                if not self.service_events(deadline):
+                    break
+                pc = self.PC
+
+            opcode = memory[pc]
+            if opcode == 0x00:
+                break
+
+            handler, num_bytes, decode, base_cycles = dispatch[opcode]
+            self.CYCLES += base_cycles
+
+            if decode is None:
+                handler(self)
+            else:
+                handler(self, decode(memory, pc))
+
+            if trace is not None:
+                trace.record(self, pc, opcode, view[pc + 1:pc + num_bytes])
+
+            self.PC = pc = (pc + num_bytes) & 0xFFFF
+
+        return self.CYCLES - start
+
+    def run_debug(self, cycles: int = None) -> int:
+        # Same as run_for_cycles (or execute_from_memory without a cycle limit) with breakpoint and
+        # watchpoint checks, breakpoints at the PC the run starts from are stepped over
+        memory = self.MEMORY
+        view = self.MEMORY_VIEW
+        trace = self.TRACE
+        breakpoints = self.BREAKPOINTS
+        conditions = self.BREAK_CONDITIONS
+        start = self.CYCLES
+        deadline = None if cycles is None else start + cycles
+
+        self.STOP_REASON = None
+        first = True
+
+        while deadline is None or self.CYCLES < deadline:
+            if self.CYCLES >= self.NEXT_EVENT and not self.service_events(deadline):
+                break
+
+            pc = self.PC
+
+            if breakpoints[pc] and not first:
+                condition = conditions.get(pc)
+                if condition is None or condition(self):
+                    self.STOP_REASON = ("break", pc)
+                    break
+            first = False
+
+            opcode = memory[pc]
+            if opcode == 0x00:
+                break
+
+            handler, num_bytes, decode, base_cycles = DISPATCH[opcode]
+            self.CYCLES += base_cycles
+
+            if decode is None:
+                handler(self)
+            else:
+                handler(self, decode(memory, pc))
+
+            if trace is not None:
+                trace.record(self, pc, opcode, view[pc + 1:pc + num_bytes])
+
+            self.PC = (pc + num_bytes) & 0xFFFF
+
+            if self.STOP_REASON is not None:  # Watchpoint hit by this instruction
+                break
+
+        return self.CYCLES - start
 
     def execute_from_rom(self) -> None:
+        rom = self.ROM
+        rom_view = memoryview(rom)
+        end = len(rom) - 1
+        trace = self.TRACE
+
+        dispatch = DISPATCH
+
+        pc = self.PC
         while True:
-            if self.PC == len(self.ROM) - 1:
+            if self.CYCLES >= self.NEXT_EVENT:
+                if not self.service_events():
+                    return
+                pc = self.PC
+
+            if pc >= end:  # An interrupt may also have vectored outside the ROM
                 return
 
-            opcode = self.ROM[self.PC]
+            opcode = rom[pc]
             if opcode == 0x00:
                 return
-            print(f"{self.OPCODES.get(opcode)}", end=" ")
 
-            num_bytes = getattr(instr, self.OPCODES[opcode].lower()).get_opcode_bytes(opcode)
+            handler, num_bytes, decode, cycles = dispatch[opcode]
+            self.CYCLES += cycles
 
-            args = []
-            for i in range(num_bytes - 1):
-                args.append(self.ROM[self.PC + i + 1])
-                print(f"{self.ROM[self.PC + i + 1]:02X}", end=" ")
-            print()
+            if decode is None:
+                handler(self)
+            else:
+                handler(self, decode(rom, pc))
 
-            getattr(instr, self.OPCODES[opcode].lower()).execute_opcode(self, opcode, *args)
+            if trace is not None:
+                trace.record(self, pc, opcode, rom_view[pc + 1:pc + num_bytes])
 
-            self.PC += num_bytes
+            self.PC = pc = pc + num_bytes
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser("W65C02S Emulator")
     parser.add_argument("--rom", dest="rom", type=str)
     parser.add_argument("--labels", dest="labels", type=str)
+    parser.add_argument("--base", dest="base", type=lambda val: int(val, 16),
+                        help="load ROM into memory at this hex address and boot from the reset vector")
+    parser.add_argument("--trace", dest="trace", choices=TRACE_SINKS.keys(),
+                        help="trace every executed instruction in the given format")
+    parser.add_argument("--trace-file", dest="trace_file", type=str,
+                        help="write the trace to this file instead of stdout")
+    parser.add_argument("--profile", dest="profile", type=str,
+                        help="profile execution and write the counts to this JSON file")
+    parser.add_argument("--batch", dest="batch", action="store_true",
+                        help="exit after execution instead of starting the interactive interface")
     _args = parser.parse_args()
 
     with open(_args.rom, "rb") as _rom_file:
         _rom = _rom_file.read()
 
     _proc = W65C02S(_rom)
-    _proc.execute_from_rom()
+    if _args.trace is not None:
+        _proc.TRACE = make_trace_sink(_args.trace, _args.trace_file)
+    if _args.profile is not None:
+        _proc.enable_profiler()
+
+    try:
+        if _args.base is None:
+            _proc.execute_from_rom()
+        else:
+            _proc.load_rom(_rom, _args.base)
+            _proc.reset()
+            _proc.execute_from_memory()
+    finally:
+        if _proc.TRACE is not None:
+            _proc.TRACE.close()
+            _proc.TRACE = _proc.PROFILER  # The profiler keeps counting for !prof
+
+        if _proc.PROFILER is not None:
+            _proc.PROFILER.dump(_args.profile)
+
+    if not _args.batch:
+        from cli import w65c02s_interface  # The interactive interface isn't loaded in batch mode
 
-    w65c02s_interface(_proc)
+        w65c02s_interface(_proc)